@@ -0,0 +1,23 @@
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StateType
+
+
+async def set_state_with_data(state: FSMContext, new_state: StateType, **data: Any) -> None:
+    """
+    Сохраняет данные шага и переводит FSM в следующее состояние.
+
+    Если хранилище умеет делать это одним запросом, используется он, иначе выполняются два вызова.
+
+    :param state: Контекст FSM.
+    :param new_state: Следующее состояние.
+    :param data: Данные для слияния с текущими.
+    """
+    batched = getattr(state.storage, "set_state_and_update_data", None)
+    if batched is not None:
+        await batched(state.key, new_state, data)
+        return
+
+    await state.update_data(**data)
+    await state.set_state(new_state)
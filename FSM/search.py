@@ -0,0 +1,5 @@
+from aiogram.fsm.state import StatesGroup, State
+
+
+class SearchStates(StatesGroup):
+    enter_query = State()
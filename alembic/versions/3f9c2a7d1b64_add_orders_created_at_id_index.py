@@ -0,0 +1,25 @@
+"""add orders created_at id index
+
+Revision ID: 3f9c2a7d1b64
+Revises: 62bda0428b1a
+Create Date: 2026-10-16 10:05:12.481903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d1b64'
+down_revision: Union[str, None] = '62bda0428b1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
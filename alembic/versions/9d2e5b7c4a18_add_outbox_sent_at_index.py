@@ -0,0 +1,28 @@
+"""add outbox sent_at index
+
+Revision ID: 9d2e5b7c4a18
+Revises: c8f3a1e5d294
+Create Date: 2026-10-16 22:10:42.318507
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2e5b7c4a18'
+down_revision: Union[str, None] = 'c8f3a1e5d294'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_outbox_sent_at', 'outbox', ['sent_at'], unique=False, postgresql_where=sa.text('sent_at IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_sent_at', table_name='outbox')
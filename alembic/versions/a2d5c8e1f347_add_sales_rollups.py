@@ -0,0 +1,71 @@
+"""add sales rollups
+
+Revision ID: a2d5c8e1f347
+Revises: f1c6a3d8e472
+Create Date: 2026-10-16 17:12:05.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d5c8e1f347'
+down_revision: Union[str, None] = 'f1c6a3d8e472'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sales_daily',
+                    sa.Column('day', sa.Date(), nullable=False),
+                    sa.Column('orders', sa.Integer(), nullable=False),
+                    sa.Column('revenue', sa.Float(), nullable=False),
+                    sa.PrimaryKeyConstraint('day')
+                    )
+    op.create_table('sales_products',
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('quantity', sa.BigInteger(), nullable=False),
+                    sa.Column('revenue', sa.Float(), nullable=False),
+                    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+                    sa.PrimaryKeyConstraint('product_id')
+                    )
+    op.create_index('ix_sales_products_quantity', 'sales_products', ['quantity'], unique=False)
+    op.create_table('order_status_counts',
+                    sa.Column('status', sa.String(length=20), nullable=False),
+                    sa.Column('orders', sa.Integer(), nullable=False),
+                    sa.PrimaryKeyConstraint('status')
+                    )
+
+    # Заполнение витрин по уже существующим заказам. Отмененные заказы не учитываются в выручке.
+    op.execute("""
+        INSERT INTO sales_daily (day, orders, revenue)
+        SELECT created_at::date, count(*), sum(total_cost)
+        FROM orders
+        WHERE status IS DISTINCT FROM 'Отменен'
+        GROUP BY created_at::date
+    """)
+    op.execute("""
+        INSERT INTO sales_products (product_id, quantity, revenue)
+        SELECT oi.product_id, sum(oi.quantity), sum(oi.price * oi.quantity)
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        WHERE o.status IS DISTINCT FROM 'Отменен'
+        GROUP BY oi.product_id
+    """)
+    op.execute("""
+        INSERT INTO order_status_counts (status, orders)
+        SELECT status, count(*)
+        FROM orders
+        WHERE status IS NOT NULL
+        GROUP BY status
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('order_status_counts')
+    op.drop_index('ix_sales_products_quantity', table_name='sales_products')
+    op.drop_table('sales_products')
+    op.drop_table('sales_daily')
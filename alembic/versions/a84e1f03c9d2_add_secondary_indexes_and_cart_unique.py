@@ -0,0 +1,54 @@
+"""add secondary indexes and cart unique constraint
+
+Revision ID: a84e1f03c9d2
+Revises: 3f9c2a7d1b64
+Create Date: 2026-10-16 11:20:47.093115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84e1f03c9d2'
+down_revision: Union[str, None] = '3f9c2a7d1b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Схлопываем дубликаты, созданные прежним select-then-insert, чтобы уникальный ключ можно было создать.
+    op.execute(
+        """
+        UPDATE cart AS c
+        SET quantity = d.total
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS total
+            FROM cart
+            GROUP BY user_id, product_id
+            HAVING count(*) > 1
+        ) AS d
+        WHERE c.id = d.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cart AS c
+        USING cart AS k
+        WHERE c.user_id = k.user_id
+          AND c.product_id = k.product_id
+          AND c.id > k.id
+        """
+    )
+    op.create_unique_constraint('uq_cart_user_id_product_id', 'cart', ['user_id', 'product_id'])
+    op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_products_category_id', table_name='products')
+    op.drop_constraint('uq_cart_user_id_product_id', 'cart', type_='unique')
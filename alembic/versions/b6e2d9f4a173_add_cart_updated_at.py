@@ -0,0 +1,31 @@
+"""add cart updated_at
+
+Revision ID: b6e2d9f4a173
+Revises: a2d5c8e1f347
+Create Date: 2026-10-16 21:10:42.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d9f4a173'
+down_revision: Union[str, None] = 'a2d5c8e1f347'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # now() вычисляется один раз при ALTER TABLE, поэтому таблица не перезаписывается, а срок хранения
+    # уже существующих корзин отсчитывается от момента миграции.
+    op.add_column('cart', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                                    nullable=False))
+    op.create_index('ix_cart_updated_at', 'cart', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cart_updated_at', table_name='cart')
+    op.drop_column('cart', 'updated_at')
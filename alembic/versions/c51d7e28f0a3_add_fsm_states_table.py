@@ -0,0 +1,35 @@
+"""add fsm states table
+
+Revision ID: c51d7e28f0a3
+Revises: a84e1f03c9d2
+Create Date: 2026-10-16 12:02:33.615820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51d7e28f0a3'
+down_revision: Union[str, None] = 'a84e1f03c9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('fsm_states',
+                    sa.Column('key', sa.String(length=255), nullable=False),
+                    sa.Column('state', sa.String(length=255), nullable=True),
+                    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+                    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('key')
+                    )
+    op.create_index('ix_fsm_states_updated_at', 'fsm_states', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fsm_states_updated_at', table_name='fsm_states')
+    op.drop_table('fsm_states')
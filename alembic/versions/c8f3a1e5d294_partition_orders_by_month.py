@@ -0,0 +1,177 @@
+"""partition orders by month
+
+Revision ID: c8f3a1e5d294
+Revises: b6e2d9f4a173
+Create Date: 2026-10-16 23:05:17.204861
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f3a1e5d294'
+down_revision: Union[str, None] = 'b6e2d9f4a173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# На сколько месяцев вперед от текущего создаются партиции. Дальше их создает бот при запуске.
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    """Сдвигает первый день месяца на заданное количество месяцев."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_tables(old_suffix: str) -> None:
+    """Переименовывает таблицы заказов, их первичные ключи и отвязывает от них последовательности id."""
+    for table in ('orders', 'order_items'):
+        op.execute(f'ALTER TABLE {table} RENAME TO {table}_{old_suffix}')
+        op.execute(f'ALTER TABLE {table}_{old_suffix} RENAME CONSTRAINT {table}_pkey TO {table}_{old_suffix}_pkey')
+        op.execute(f'ALTER TABLE {table}_{old_suffix} ALTER COLUMN id DROP DEFAULT')
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+
+def _attach_sequences() -> None:
+    """Привязывает последовательности id к новым таблицам заказов."""
+    for table in ('orders', 'order_items'):
+        op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+
+def upgrade() -> None:
+    # Таблицы нельзя партиционировать на месте: старые переименовываются, данные копируются в новые
+    # партиционированные таблицы с теми же именами, после чего старые удаляются.
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_constraint('order_items_order_id_fkey', 'order_items', type_='foreignkey')
+    _rename_tables('unpartitioned')
+
+    # Первичный и внешний ключи партиционированной таблицы должны включать ключ партиционирования,
+    # поэтому в позиции копируется дата создания заказа.
+    op.create_table('orders',
+                    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('orders_id_seq')"),
+                              nullable=False),
+                    sa.Column('user_id', sa.BigInteger(), nullable=False),
+                    sa.Column('name', sa.String(length=100), nullable=False),
+                    sa.Column('phone', sa.String(length=20), nullable=False),
+                    sa.Column('address', sa.Text(), nullable=False),
+                    sa.Column('total_cost', sa.Float(), nullable=False),
+                    sa.Column('status', sa.String(length=20), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), server_default=sa.text("timezone('utc', now())"),
+                              nullable=False),
+                    sa.PrimaryKeyConstraint('id', 'created_at'),
+                    postgresql_partition_by='RANGE (created_at)'
+                    )
+    op.create_table('order_items',
+                    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('order_items_id_seq')"),
+                              nullable=False),
+                    sa.Column('order_id', sa.Integer(), nullable=False),
+                    sa.Column('order_created_at', sa.DateTime(), nullable=False),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('quantity', sa.Integer(), nullable=False),
+                    sa.Column('price', sa.Float(), nullable=False),
+                    sa.PrimaryKeyConstraint('id', 'order_created_at'),
+                    postgresql_partition_by='RANGE (order_created_at)'
+                    )
+    _attach_sequences()
+
+    # Партиции с месяца самого старого заказа по MONTHS_AHEAD месяцев вперед от текущего.
+    bounds = op.get_bind().execute(sa.text(
+        "SELECT date_trunc('month', coalesce(min(created_at), timezone('utc', now())))::date, "
+        "date_trunc('month', timezone('utc', now()))::date FROM orders_unpartitioned"
+    )).one()
+    month, last = bounds[0], _add_months(bounds[1], MONTHS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        for table in ('orders', 'order_items'):
+            op.execute(f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+                       f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')")
+        month = following
+
+    op.execute(
+        """
+        INSERT INTO orders (id, user_id, name, phone, address, total_cost, status, created_at)
+        SELECT id, user_id, name, phone, address, total_cost, status, created_at
+        FROM orders_unpartitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_items (id, order_id, order_created_at, product_id, quantity, price)
+        SELECT i.id, i.order_id, o.created_at, i.product_id, i.quantity, i.price
+        FROM order_items_unpartitioned i
+        JOIN orders_unpartitioned o ON o.id = i.order_id
+        """
+    )
+    op.drop_table('order_items_unpartitioned')
+    op.drop_table('orders_unpartitioned')
+
+    # Индексы и ключи создаются после копирования данных: так быстрее, чем обновлять их на каждой вставке.
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_foreign_key('fk_order_items_order', 'order_items', 'orders',
+                          ['order_id', 'order_created_at'], ['id', 'created_at'])
+    op.create_foreign_key('order_items_product_id_fkey', 'order_items', 'products', ['product_id'], ['id'])
+
+
+def downgrade() -> None:
+    # Заказы из отсоединенных (архивированных) партиций не возвращаются: они остаются в файлах архива.
+    op.drop_constraint('fk_order_items_order', 'order_items', type_='foreignkey')
+    op.drop_constraint('order_items_product_id_fkey', 'order_items', type_='foreignkey')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
+    _rename_tables('partitioned')
+
+    op.create_table('orders',
+                    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('orders_id_seq')"),
+                              nullable=False),
+                    sa.Column('user_id', sa.BigInteger(), nullable=False),
+                    sa.Column('name', sa.String(length=100), nullable=False),
+                    sa.Column('phone', sa.String(length=20), nullable=False),
+                    sa.Column('address', sa.Text(), nullable=False),
+                    sa.Column('total_cost', sa.Float(), nullable=False),
+                    sa.Column('status', sa.String(length=20), nullable=False),
+                    sa.Column('created_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_table('order_items',
+                    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('order_items_id_seq')"),
+                              nullable=False),
+                    sa.Column('order_id', sa.Integer(), nullable=False),
+                    sa.Column('product_id', sa.Integer(), nullable=False),
+                    sa.Column('quantity', sa.Integer(), nullable=False),
+                    sa.Column('price', sa.Float(), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    _attach_sequences()
+
+    op.execute(
+        """
+        INSERT INTO orders (id, user_id, name, phone, address, total_cost, status, created_at)
+        SELECT id, user_id, name, phone, address, total_cost, status, created_at
+        FROM orders_partitioned
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_items (id, order_id, product_id, quantity, price)
+        SELECT id, order_id, product_id, quantity, price
+        FROM order_items_partitioned
+        """
+    )
+    op.drop_table('order_items_partitioned')
+    op.drop_table('orders_partitioned')
+
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
+    op.create_foreign_key('order_items_order_id_fkey', 'order_items', 'orders', ['order_id'], ['id'])
+    op.create_foreign_key('order_items_product_id_fkey', 'order_items', 'products', ['product_id'], ['id'])
@@ -0,0 +1,42 @@
+"""add outbox table
+
+Revision ID: d7a4e9b2c615
+Revises: c51d7e28f0a3
+Create Date: 2026-10-16 14:20:11.284913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a4e9b2c615'
+down_revision: Union[str, None] = 'c51d7e28f0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox',
+                    sa.Column('id', sa.BigInteger(), nullable=False),
+                    sa.Column('kind', sa.String(length=32), nullable=False),
+                    sa.Column('chat_id', sa.BigInteger(), nullable=False),
+                    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+                    sa.Column('dedupe_key', sa.String(length=100), nullable=False),
+                    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+                    sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+                    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('dedupe_key')
+                    )
+    op.create_index('ix_outbox_pending', 'outbox', ['available_at', 'id'], unique=False,
+                    postgresql_where=sa.text('sent_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_pending', table_name='outbox', postgresql_where=sa.text('sent_at IS NULL'))
+    op.drop_table('outbox')
@@ -0,0 +1,27 @@
+"""add products category_id id index
+
+Revision ID: f1c6a3d8e472
+Revises: e3b8f1a6d920
+Create Date: 2026-10-16 15:48:20.553190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a3d8e472'
+down_revision: Union[str, None] = 'e3b8f1a6d920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_category_id_id', 'products', ['category_id', 'id'], unique=False)
+    op.drop_index('ix_products_category_id', table_name='products')
+
+
+def downgrade() -> None:
+    op.create_index('ix_products_category_id', 'products', ['category_id'], unique=False)
+    op.drop_index('ix_products_category_id_id', table_name='products')
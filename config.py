@@ -12,6 +12,60 @@ class Settings(BaseSettings):
         DB_USER: Пользователь базы данных.
         DB_PASS: Пароль пользователя базы данных.
         DB_NAME: Название базы данных.
+        DB_ECHO: Логировать ли все SQL-запросы (только для отладки).
+        DB_POOL_SIZE: Количество постоянных соединений в пуле.
+        DB_MAX_OVERFLOW: Количество дополнительных соединений сверх DB_POOL_SIZE при пиковой нагрузке.
+        DB_POOL_TIMEOUT: Время ожидания свободного соединения в секундах.
+        DB_POOL_RECYCLE: Время жизни соединения в секундах, после которого оно переоткрывается.
+        DB_POOL_PRE_PING: Проверять ли соединение перед выдачей из пула.
+        DB_STATEMENT_CACHE_SIZE: Размер кэша подготовленных выражений asyncpg (0 — отключить, например для pgbouncer).
+        CATALOG_CACHE_MAXSIZE: Максимальное количество записей в кэше каталога.
+        CATALOG_CACHE_TTL: Время жизни записи кэша каталога в секундах.
+        SEARCH_CACHE_MAXSIZE: Максимальное количество запросов в кэше результатов поиска.
+        SEARCH_CACHE_TTL: Время жизни результатов поиска в кэше в секундах.
+        VIEW_CACHE_MAXSIZE: Максимальное количество отрисованных представлений каталога в кэше.
+        VIEW_CACHE_TTL: Время жизни отрисованного представления в кэше в секундах.
+        USE_WEBHOOK: Если True, бот принимает апдейты через вебхук вместо long polling.
+        WEBHOOK_URL: Внешний базовый URL, по которому Telegram доступен вебхук.
+        WEBHOOK_PATH: Путь обработчика вебхука.
+        WEBHOOK_SECRET: Секретный токен для проверки заголовка X-Telegram-Bot-Api-Secret-Token.
+        WEBAPP_HOST: Адрес, на котором слушает встроенный веб-сервер.
+        WEBAPP_PORT: Порт встроенного веб-сервера.
+        WEBHOOK_MAX_PENDING: Максимальное количество принятых через вебхук, но еще не обработанных апдейтов.
+        WEBHOOK_SHUTDOWN_TIMEOUT: Время ожидания завершения принятых апдейтов при остановке, в секундах.
+        FSM_STATE_TTL: Время жизни неактивного состояния FSM в секундах.
+        FSM_CLEANUP_INTERVAL: Интервал удаления устаревших состояний FSM в секундах.
+        METRICS_ENABLED: Включает сбор метрик и HTTP-эндпоинт /metrics в формате Prometheus.
+        METRICS_HOST: Адрес эндпоинта метрик.
+        METRICS_PORT: Порт эндпоинта метрик.
+        CART_WRITE_BEHIND: Хранить корзины в памяти процесса и записывать изменения в базу пакетами.
+        CART_FLUSH_INTERVAL: Интервал записи изменений корзин в базу в секундах.
+        CART_STORE_MAX_USERS: Максимальное количество корзин в памяти.
+        CART_TTL: Через сколько секунд без изменений корзина считается брошенной и удаляется.
+        CART_SWEEP_INTERVAL: Интервал между проходами удаления брошенных корзин в секундах.
+        CART_SWEEP_BATCH_SIZE: Сколько строк корзин удалять одним запросом.
+        CART_SWEEP_PAUSE: Пауза между пакетами удаления в секундах.
+        ORDER_PARTITIONS_AHEAD: На сколько месяцев вперед создавать партиции заказов.
+        ORDER_PARTITIONS_INTERVAL: Интервал проверки партиций заказов в секундах.
+        OUTBOUND_RATE_LIMIT: Пропускать отправку сообщений через очередь с ограничением частоты.
+        OUTBOUND_GLOBAL_RATE: Общий лимит отправляемых сообщений в секунду.
+        OUTBOUND_CHAT_RATE: Лимит сообщений в секунду для одного личного чата.
+        OUTBOUND_CHAT_BURST: Сколько сообщений в один чат можно отправить подряд без ожидания.
+        OUTBOUND_GROUP_RATE: Лимит сообщений в секунду для одной группы.
+        OUTBOUND_MAX_RETRIES: Сколько раз повторять запрос после ответа 429.
+        ADMIN_IDS: Telegram ID администраторов, которые получают уведомления о новых заказах (JSON-список).
+        OUTBOX_BATCH_SIZE: Сколько уведомлений из outbox отправляется за один проход.
+        OUTBOX_CONCURRENCY: Максимальное количество одновременно отправляемых уведомлений.
+        OUTBOX_POLL_INTERVAL: Интервал проверки outbox на новые уведомления в секундах.
+        OUTBOX_LEASE: На сколько секунд уведомление резервируется за отправителем.
+        OUTBOX_MAX_ATTEMPTS: Сколько раз пытаться отправить уведомление, прежде чем отказаться.
+        OUTBOX_RETENTION: Через сколько секунд после отправки уведомление удаляется из outbox.
+        OUTBOX_PRUNE_INTERVAL: Интервал удаления отправленных уведомлений из outbox в секундах.
+        WORKERS: Количество процессов-обработчиков апдейтов (больше 1 — запуск в многопроцессном режиме).
+        WORKER_MAX_PENDING: Максимальное количество принятых процессом, но еще не обработанных апдейтов.
+        WORKER_SHUTDOWN_TIMEOUT: Время ожидания завершения принятых апдейтов при остановке процесса, в секундах.
+        UPDATE_CONCURRENCY: Максимальное количество апдейтов, обрабатываемых одновременно (по умолчанию DB_POOL_SIZE).
+        USER_QUEUE_LIMIT: Сколько апдейтов одного пользователя может ожидать обработки, прежде чем новые отбрасываются.
     """
 
     BOT_TOKEN: str
@@ -22,6 +76,76 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_NAME: str
 
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    CATALOG_CACHE_MAXSIZE: int = 1024
+    CATALOG_CACHE_TTL: float = 300.0
+    SEARCH_CACHE_MAXSIZE: int = 1024
+    SEARCH_CACHE_TTL: float = 30.0
+    VIEW_CACHE_MAXSIZE: int = 4096
+    VIEW_CACHE_TTL: float = 300.0
+
+    USE_WEBHOOK: bool = False
+    WEBHOOK_URL: str = ""
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str | None = None
+    WEBAPP_HOST: str = "0.0.0.0"
+    WEBAPP_PORT: int = 8080
+    WEBHOOK_MAX_PENDING: int = 1000
+    WEBHOOK_SHUTDOWN_TIMEOUT: float = 10.0
+
+    FSM_STATE_TTL: float = 86400.0
+    FSM_CLEANUP_INTERVAL: float = 3600.0
+
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9100
+
+    CART_WRITE_BEHIND: bool = False
+    CART_FLUSH_INTERVAL: float = 1.0
+    CART_STORE_MAX_USERS: int = 10000
+    CART_TTL: float = 30 * 86400.0
+    CART_SWEEP_INTERVAL: float = 3600.0
+    CART_SWEEP_BATCH_SIZE: int = 500
+    CART_SWEEP_PAUSE: float = 0.1
+
+    ORDER_PARTITIONS_AHEAD: int = 3
+    ORDER_PARTITIONS_INTERVAL: float = 86400.0
+
+    OUTBOUND_RATE_LIMIT: bool = True
+    OUTBOUND_GLOBAL_RATE: float = 30.0
+    OUTBOUND_CHAT_RATE: float = 1.0
+    OUTBOUND_CHAT_BURST: int = 3
+    OUTBOUND_GROUP_RATE: float = 20 / 60
+    OUTBOUND_MAX_RETRIES: int = 3
+
+    ADMIN_IDS: list[int] = []
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CONCURRENCY: int = 10
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_LEASE: float = 60.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETENTION: float = 7 * 86400.0
+    OUTBOX_PRUNE_INTERVAL: float = 3600.0
+
+    WORKERS: int = 1
+    WORKER_MAX_PENDING: int = 1000
+    WORKER_SHUTDOWN_TIMEOUT: float = 10.0
+
+    UPDATE_CONCURRENCY: int | None = None
+    USER_QUEUE_LIMIT: int = 10
+
+    @property
+    def update_concurrency(self) -> int:
+        """Лимит одновременно обрабатываемых апдейтов: UPDATE_CONCURRENCY или размер пула соединений."""
+        return self.UPDATE_CONCURRENCY or self.DB_POOL_SIZE
+
     @property
     def database_url(self) -> str:
         """Собирает асинхронный URL для подключения к базе данных из компонентов."""
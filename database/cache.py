@@ -0,0 +1,112 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from config import settings
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кэш в памяти с вытеснением по LRU и сроком жизни записей.
+
+    Предназначен для использования внутри одного event loop, поэтому не использует блокировки.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Инициализирует кэш.
+
+        :param maxsize: Максимальное количество записей.
+        :param ttl: Время жизни записи в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Возвращает значение из кэша.
+
+        :param key: Ключ записи.
+        :return: Сохраненное значение или MISSING, если записи нет или она устарела.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение в кэше, вытесняя самые давно использованные записи при переполнении.
+
+        :param key: Ключ записи.
+        :param value: Значение.
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        Удаляет записи с указанными ключами.
+
+        :param keys: Ключи удаляемых записей.
+        """
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает счетчики использования кэша.
+
+        :return: Словарь с количеством записей, попаданий, промахов и вытеснений.
+        """
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CatalogVersion:
+    """
+    Номер версии каталога, который увеличивается при каждом изменении категорий или товаров.
+
+    Входит в ключи кэша отрисованных представлений, поэтому после изменения каталога старые записи
+    перестают использоваться и со временем вытесняются.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self) -> None:
+        """Увеличивает номер версии."""
+        self.value += 1
+
+
+catalog_version = CatalogVersion()
+catalog_cache = TTLCache(maxsize=settings.CATALOG_CACHE_MAXSIZE, ttl=settings.CATALOG_CACHE_TTL)
+search_cache = TTLCache(maxsize=settings.SEARCH_CACHE_MAXSIZE, ttl=settings.SEARCH_CACHE_TTL)
+view_cache = TTLCache(maxsize=settings.VIEW_CACHE_MAXSIZE, ttl=settings.VIEW_CACHE_TTL)
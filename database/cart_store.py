@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Sequence
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from config import settings
+from database.database import engine
+from database.models import Cart
+from database.requests import get_product, get_products
+
+logger = logging.getLogger(__name__)
+
+# Ограничение размера пакета: у PostgreSQL не больше 32767 параметров на запрос.
+FLUSH_BATCH_SIZE = 1000
+
+
+class CartLine(NamedTuple):
+    """
+    Строка корзины из хранилища в памяти.
+
+    В качестве id используется ID товара: пара (user_id, product_id) уникальна,
+    а у новых строк еще нет ID в базе данных.
+    """
+
+    id: int
+    quantity: int
+    name: str
+    price: float
+
+
+class _UserCart:
+    """
+    Корзина одного пользователя: текущие количества, товары, измененные с последней записи в базу,
+    и время последнего изменения (Unix time).
+    """
+
+    __slots__ = ("quantities", "dirty", "touched_at")
+
+    def __init__(self, quantities: dict[int, int], touched_at: float):
+        self.quantities = quantities
+        self.dirty: set[int] = set()
+        self.touched_at = touched_at
+
+
+class CartStore:
+    """
+    Хранилище корзин в памяти процесса с отложенной записью в базу данных.
+
+    Корзина пользователя загружается из базы при первом обращении, после чего читается и изменяется в памяти.
+    Итоговые изменения периодически записываются в таблицу cart пакетными многострочными запросами,
+    а также перед оформлением заказа и при остановке бота.
+
+    Предполагается, что корзину пользователя изменяет только один процесс.
+    """
+
+    def __init__(self, engine: AsyncEngine, flush_interval: float, max_users: int, ttl: float):
+        """
+        Инициализирует хранилище.
+
+        :param engine: Асинхронный движок SQLAlchemy.
+        :param flush_interval: Интервал записи изменений в базу в секундах.
+        :param max_users: Максимальное количество корзин в памяти (вытесняются только записанные).
+        :param ttl: Через сколько секунд без изменений корзина может быть удалена из базы как брошенная;
+            такая корзина перечитывается из базы при следующем обращении.
+        """
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_users = max_users
+        self.ttl = ttl
+        self._carts: OrderedDict[int, _UserCart] = OrderedDict()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self.flushed_rows = 0
+
+    @property
+    def dirty_users(self) -> int:
+        """Количество корзин с незаписанными изменениями."""
+        return sum(1 for cart in self._carts.values() if cart.dirty)
+
+    async def _load(self, session: AsyncSession, user_id: int) -> _UserCart:
+        """
+        Возвращает корзину пользователя, загружая ее из базы при первом обращении.
+
+        Записанная корзина, которая не менялась дольше ttl, загружается заново, потому что ее строки
+        могли быть удалены как брошенные.
+        """
+        cart = self._carts.get(user_id)
+        if cart is not None and not cart.dirty and time.time() - cart.touched_at > self.ttl:
+            del self._carts[user_id]
+            cart = None
+        if cart is None:
+            query = select(Cart.product_id, Cart.quantity, Cart.updated_at).where(Cart.user_id == user_id)
+            rows = (await session.execute(query)).all()
+            cart = self._carts.get(user_id)
+            if cart is None:
+                touched_at = max((row.updated_at.timestamp() for row in rows), default=time.time())
+                cart = _UserCart({row.product_id: row.quantity for row in rows}, touched_at)
+                self._carts[user_id] = cart
+                self._evict(keep=user_id)
+        self._carts.move_to_end(user_id)
+        return cart
+
+    def _evict(self, keep: int | None = None) -> None:
+        """
+        Вытесняет самые давно использованные корзины без незаписанных изменений.
+
+        :param keep: ID пользователя, чью корзину нельзя вытеснять.
+        """
+        excess = len(self._carts) - self.max_users
+        if excess <= 0:
+            return
+        # Корзины перебираются от самой давно использованной, пока не наберется excess вытесняемых.
+        evicted = []
+        for user_id, cart in self._carts.items():
+            if len(evicted) == excess:
+                break
+            if not cart.dirty and user_id != keep:
+                evicted.append(user_id)
+        for user_id in evicted:
+            del self._carts[user_id]
+
+    async def _view(self, session: AsyncSession, cart: _UserCart) -> list[CartLine]:
+        """Собирает строки корзины, беря названия и цены из кэша каталога."""
+        products = await get_products(session, cart.quantities)
+        return [
+            CartLine(product_id, quantity, products[product_id].name, products[product_id].price)
+            for product_id, quantity in cart.quantities.items()
+            if product_id in products
+        ]
+
+    async def get_cart_view(self, session: AsyncSession, user_id: int) -> Sequence[CartLine]:
+        """
+        Получает содержимое корзины.
+
+        :param session: Асинхронная сессия базы данных.
+        :param user_id: ID пользователя.
+        :return: Строки корзины.
+        """
+        return await self._view(session, await self._load(session, user_id))
+
+    async def add(self, session: AsyncSession, user_id: int, product_id: int) -> Sequence[CartLine]:
+        """
+        Добавляет товар в корзину или увеличивает его количество.
+
+        :param session: Асинхронная сессия базы данных.
+        :param user_id: ID пользователя.
+        :param product_id: ID товара.
+        :return: Обновленные строки корзины.
+        """
+        cart = await self._load(session, user_id)
+        if await get_product(session, product_id) is not None:
+            cart.quantities[product_id] = cart.quantities.get(product_id, 0) + 1
+            cart.dirty.add(product_id)
+            cart.touched_at = time.time()
+        return await self._view(session, cart)
+
+    async def update(self, session: AsyncSession, user_id: int, product_id: int, action: str) -> Sequence[CartLine]:
+        """
+        Изменяет количество товара в корзине.
+
+        :param session: Асинхронная сессия базы данных.
+        :param user_id: ID пользователя.
+        :param product_id: ID товара (id строки из CartLine).
+        :param action: Действие ('incr', 'decr' или 'del'). При уменьшении до нуля товар удаляется.
+        :return: Обновленные строки корзины.
+        :raises ValueError: Если действие неизвестно.
+        """
+        if action not in ("incr", "decr", "del"):
+            raise ValueError(f"Неизвестное действие с корзиной: {action}")
+
+        cart = await self._load(session, user_id)
+        quantity = cart.quantities.get(product_id)
+        if quantity is not None:
+            if action == "incr":
+                cart.quantities[product_id] = quantity + 1
+            elif action == "decr" and quantity > 1:
+                cart.quantities[product_id] = quantity - 1
+            else:
+                del cart.quantities[product_id]
+            cart.dirty.add(product_id)
+            cart.touched_at = time.time()
+        return await self._view(session, cart)
+
+    async def flush(self, user_id: int | None = None) -> int:
+        """
+        Записывает изменения корзин в базу данных пакетными многострочными запросами.
+
+        :param user_id: ID пользователя, чью корзину нужно записать (None — все корзины).
+        :return: Количество записанных строк.
+        """
+        async with self._flush_lock:
+            user_ids = [user_id] if user_id is not None else list(self._carts)
+            upserts = []
+            removals = []
+            taken: list[tuple[_UserCart, set[int]]] = []
+            for uid in user_ids:
+                cart = self._carts.get(uid)
+                if cart is None or not cart.dirty:
+                    continue
+                dirty, cart.dirty = cart.dirty, set()
+                taken.append((cart, dirty))
+                for product_id in dirty:
+                    quantity = cart.quantities.get(product_id)
+                    if quantity is None:
+                        removals.append((uid, product_id))
+                    else:
+                        upserts.append({"user_id": uid, "product_id": product_id, "quantity": quantity})
+
+            if not taken:
+                return 0
+
+            try:
+                async with self.engine.begin() as conn:
+                    for start in range(0, len(upserts), FLUSH_BATCH_SIZE):
+                        query = insert(Cart).values(upserts[start:start + FLUSH_BATCH_SIZE])
+                        query = query.on_conflict_do_update(
+                            constraint="uq_cart_user_id_product_id",
+                            set_={"quantity": query.excluded.quantity, "updated_at": func.now()},
+                        )
+                        await conn.execute(query)
+                    for start in range(0, len(removals), FLUSH_BATCH_SIZE):
+                        batch = removals[start:start + FLUSH_BATCH_SIZE]
+                        await conn.execute(delete(Cart).where(tuple_(Cart.user_id, Cart.product_id).in_(batch)))
+            except Exception:
+                for cart, dirty in taken:
+                    cart.dirty |= dirty
+                raise
+
+            written = len(upserts) + len(removals)
+            self.flushed_rows += written
+            self._evict()
+            return written
+
+    def forget(self, user_id: int) -> None:
+        """
+        Удаляет из памяти записанные в базу строки корзины, например после того как оформление заказа удалило их
+        из базы.
+
+        Строки, измененные после последней записи (например, нажатия между flush и оформлением заказа), остаются
+        и будут записаны в базу. Корзина без таких строк удаляется из памяти целиком.
+
+        :param user_id: ID пользователя.
+        """
+        cart = self._carts.get(user_id)
+        if cart is None:
+            return
+        if not cart.dirty:
+            del self._carts[user_id]
+            return
+        cart.quantities = {
+            product_id: quantity for product_id, quantity in cart.quantities.items() if product_id in cart.dirty
+        }
+
+    async def _flush_loop(self) -> None:
+        """Периодически записывает изменения в базу данных."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Ошибка при записи корзин в базу данных: %s", e)
+
+    async def start(self) -> None:
+        """Запускает фоновую запись изменений."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Останавливает фоновую запись и записывает оставшиеся изменения."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        written = await self.flush()
+        if written:
+            logger.info("При остановке записано %d строк корзин", written)
+
+
+cart_store = (
+    CartStore(engine, settings.CART_FLUSH_INTERVAL, settings.CART_STORE_MAX_USERS, settings.CART_TTL)
+    if settings.CART_WRITE_BEHIND
+    else None
+)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import aliased
+
+from database.models import Cart
+from utils.metrics import CART_SWEEP_DURATION, CART_SWEPT_ROWS
+
+logger = logging.getLogger(__name__)
+
+
+class CartSweeper:
+    """
+    Фоновое удаление брошенных корзин.
+
+    Корзина считается брошенной, если ни одна ее строка не изменялась дольше ttl секунд. Строки удаляются
+    небольшими пакетами, каждый в своей транзакции: DELETE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE
+    SKIP LOCKED), с паузой между пакетами, поэтому блокировки держатся недолго, а строки, с которыми
+    в этот момент работает пользователь, пропускаются. Несколько процессов могут удалять корзины одновременно.
+    """
+
+    def __init__(self, engine: AsyncEngine, ttl: float, interval: float, batch_size: int, pause: float):
+        """
+        Инициализирует удаление корзин.
+
+        :param engine: Асинхронный движок SQLAlchemy.
+        :param ttl: Через сколько секунд без изменений корзина считается брошенной.
+        :param interval: Интервал между проходами в секундах.
+        :param batch_size: Сколько строк удалять одним запросом.
+        :param pause: Пауза между пакетами в секундах.
+        """
+        self.engine = engine
+        self.ttl = ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task: asyncio.Task | None = None
+
+    async def _delete_batch(self) -> int:
+        """Удаляет один пакет строк брошенных корзин и возвращает количество удаленных строк."""
+        cutoff = func.now() - timedelta(seconds=self.ttl)
+        fresh = aliased(Cart)
+        batch = (
+            select(Cart.id)
+            .where(
+                Cart.updated_at < cutoff,
+                ~exists().where(fresh.user_id == Cart.user_id, fresh.updated_at >= cutoff),
+            )
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(delete(Cart).where(Cart.id.in_(batch.scalar_subquery())))
+        return result.rowcount
+
+    async def sweep(self) -> int:
+        """
+        Удаляет все брошенные корзины пакетами.
+
+        :return: Количество удаленных строк.
+        """
+        started_at = time.perf_counter()
+        deleted = 0
+        try:
+            while True:
+                batch = await self._delete_batch()
+                deleted += batch
+                CART_SWEPT_ROWS.inc(batch)
+                if batch < self.batch_size:
+                    break
+                await asyncio.sleep(self.pause)
+        finally:
+            CART_SWEEP_DURATION.observe(time.perf_counter() - started_at)
+        if deleted:
+            logger.info("Удалено %d строк брошенных корзин", deleted)
+        return deleted
+
+    async def _run(self) -> None:
+        """Периодически удаляет брошенные корзины."""
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error("Ошибка при удалении брошенных корзин: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Запускает фоновое удаление корзин."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает фоновое удаление корзин."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import uuid
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from database.cache import catalog_cache, catalog_version, search_cache
+
+logger = logging.getLogger(__name__)
+
+# Канал PostgreSQL NOTIFY, через который процессы сообщают друг другу об изменении каталога.
+CATALOG_CHANNEL = "catalog_changed"
+# Как часто проверять, что соединение слушателя живо, и с какой паузой переподключаться, в секундах.
+PING_INTERVAL = 30.0
+# Идентификатор процесса в уведомлениях, чтобы процесс не сбрасывал кэши по собственному уведомлению.
+# PID для этого не подходит: у процессов на разных хостах он может совпасть.
+SENDER_ID = uuid.uuid4().hex
+
+
+def reset_catalog_caches() -> None:
+    """Сбрасывает кэши каталога и поиска и увеличивает версию каталога, чтобы представления отрисовались заново."""
+    catalog_cache.clear()
+    search_cache.clear()
+    catalog_version.bump()
+
+
+async def notify_catalog_changed(conn: AsyncSession | AsyncConnection) -> None:
+    """
+    Сообщает остальным процессам об изменении каталога.
+
+    Вызывается в транзакции, которая изменяет каталог: PostgreSQL доставляет уведомление только после ее фиксации
+    и не доставляет при откате.
+
+    :param conn: Сессия или соединение с открытой транзакцией.
+    """
+    await conn.execute(
+        text("SELECT pg_notify(:channel, :sender)"), {"channel": CATALOG_CHANNEL, "sender": SENDER_ID}
+    )
+
+
+class CatalogSyncListener:
+    """
+    Слушатель уведомлений об изменении каталога из других процессов (многопроцессный режим, несколько экземпляров
+    бота, скрипт импорта каталога).
+
+    Держит одно соединение из пула в режиме LISTEN. Получив уведомление от другого процесса, сбрасывает кэши
+    каталога. После потери соединения переподключается и тоже сбрасывает кэши, так как уведомления за время
+    отключения потеряны.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        """
+        Инициализирует слушателя.
+
+        :param engine: Асинхронный движок SQLAlchemy.
+        """
+        self.engine = engine
+        self._task: asyncio.Task | None = None
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        """Сбрасывает кэши при изменении каталога другим процессом."""
+        if payload != SENDER_ID:
+            reset_catalog_caches()
+
+    async def _listen(self) -> None:
+        """Слушает канал, пока соединение живо."""
+        async with self.engine.connect() as conn:
+            driver_connection = (await conn.get_raw_connection()).driver_connection
+            await driver_connection.add_listener(CATALOG_CHANNEL, self._on_notification)
+            try:
+                reset_catalog_caches()
+                while True:
+                    await asyncio.sleep(PING_INTERVAL)
+                    await driver_connection.execute("SELECT 1")
+            finally:
+                if not driver_connection.is_closed():
+                    await driver_connection.remove_listener(CATALOG_CHANNEL, self._on_notification)
+
+    async def _run(self) -> None:
+        """Слушает уведомления и переподключается после ошибок."""
+        while True:
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.error("Ошибка слушателя изменений каталога: %s", e)
+            await asyncio.sleep(PING_INTERVAL)
+
+    async def start(self) -> None:
+        """Запускает слушателя."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает слушателя."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -1,5 +1,9 @@
+import time
+
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from config import settings
 
@@ -8,13 +12,82 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(settings.database_url, echo=True)
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который дополнительно учитывает время ожидания свободного соединения.
+
+    Ожиданием считается только блокировка в очереди пула, когда переполнение исчерпано. Открытие нового
+    соединения (TCP, TLS, аутентификация) при росте пула в ожидание не входит.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def connect(self):
+        self.checkouts += 1
+        return super().connect()
+
+    def _do_get(self):
+        # При исчерпанном переполнении QueuePool только ждет соединение в очереди и никогда не открывает новое.
+        # Иначе он берет свободное соединение без ожидания или открывает новое.
+        if self._max_overflow < 0 or self._overflow < self._max_overflow:
+            return super()._do_get()
+
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started_at
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+
+def _build_url():
+    """Добавляет к URL базы данных размер кэша подготовленных выражений SQLAlchemy."""
+    return make_url(settings.database_url).update_query_dict(
+        {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+    )
+
+
+engine = create_async_engine(
+    _build_url(),
+    echo=settings.DB_ECHO,
+    poolclass=MeteredQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+)
 
 async_session_factory = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+def get_pool_stats() -> dict[str, float]:
+    """
+    Возвращает текущую статистику пула соединений.
+
+    :return: Словарь с размером пула, числом занятых и свободных соединений, переполнением
+        и временем ожидания соединения.
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts_total": pool.checkouts,
+        "wait_seconds_total": pool.wait_time_total,
+        "wait_seconds_max": pool.wait_time_max,
+    }
+
+
 async def create_tables() -> None:
     """
     Создает все таблицы в базе данных на основе моделей.
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import ColumnElement, case, delete, false, func, literal, select
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.models import FSMRecord
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresStorage(BaseStorage):
+    """
+    Хранилище состояний FSM в PostgreSQL.
+
+    Состояния переживают перезапуск бота и доступны всем процессам, подключенным к одной базе.
+    Все записи выполняются одним запросом INSERT ... ON CONFLICT DO UPDATE. Записи, которые не
+    обновлялись дольше state_ttl, считаются пустыми и периодически удаляются.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        state_ttl: float | None = None,
+        cleanup_interval: float = 3600.0,
+        key_builder: Optional[KeyBuilder] = None,
+    ):
+        """
+        Инициализирует хранилище.
+
+        :param engine: Асинхронный движок SQLAlchemy.
+        :param state_ttl: Время жизни неактивного состояния в секундах (None — без ограничения).
+        :param cleanup_interval: Интервал удаления устаревших записей в секундах.
+        :param key_builder: Построитель ключей записей.
+        """
+        self.engine = engine
+        self.state_ttl = state_ttl
+        self.cleanup_interval = cleanup_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(
+            prefix="fsm", with_bot_id=True, with_business_connection_id=True, with_destiny=True
+        )
+        self._cleanup_task: asyncio.Task | None = None
+
+    def _expired(self) -> ColumnElement[bool]:
+        """Возвращает условие, истинное для устаревшей записи."""
+        if self.state_ttl is None:
+            return false()
+        return FSMRecord.updated_at < func.now() - timedelta(seconds=self.state_ttl)
+
+    def _alive(self) -> ColumnElement[bool]:
+        """Возвращает условие, истинное для актуальной записи."""
+        if self.state_ttl is None:
+            return literal(True)
+        return FSMRecord.updated_at >= func.now() - timedelta(seconds=self.state_ttl)
+
+    @staticmethod
+    def _resolve_state(state: StateType) -> str | None:
+        """Приводит состояние к строке."""
+        return state.state if isinstance(state, State) else state
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """
+        Устанавливает состояние, сохраняя данные (если запись не устарела).
+
+        :param key: Ключ хранилища.
+        :param state: Новое состояние.
+        """
+        query = insert(FSMRecord).values(key=self.key_builder.build(key), state=self._resolve_state(state))
+        query = query.on_conflict_do_update(
+            index_elements=[FSMRecord.key],
+            set_={
+                "state": query.excluded.state,
+                "data": case((self._expired(), literal({}, JSONB)), else_=FSMRecord.data),
+                "updated_at": func.now(),
+            },
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(query)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        """
+        Получает текущее состояние.
+
+        :param key: Ключ хранилища.
+        :return: Состояние или None.
+        """
+        query = select(FSMRecord.state).where(FSMRecord.key == self.key_builder.build(key), self._alive())
+        async with self.engine.connect() as conn:
+            return await conn.scalar(query)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        """
+        Полностью заменяет данные, сохраняя состояние (если запись не устарела).
+
+        :param key: Ключ хранилища.
+        :param data: Новые данные.
+        """
+        query = insert(FSMRecord).values(key=self.key_builder.build(key), data=data)
+        query = query.on_conflict_do_update(
+            index_elements=[FSMRecord.key],
+            set_={
+                "state": case((self._expired(), None), else_=FSMRecord.state),
+                "data": query.excluded.data,
+                "updated_at": func.now(),
+            },
+        )
+        async with self.engine.begin() as conn:
+            await conn.execute(query)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """
+        Получает данные.
+
+        :param key: Ключ хранилища.
+        :return: Словарь данных (пустой, если записи нет).
+        """
+        query = select(FSMRecord.data).where(FSMRecord.key == self.key_builder.build(key), self._alive())
+        async with self.engine.connect() as conn:
+            data = await conn.scalar(query)
+        return data or {}
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Дополняет данные одним запросом, без предварительного чтения.
+
+        :param key: Ключ хранилища.
+        :param data: Данные для слияния с текущими.
+        :return: Данные после обновления.
+        """
+        return await self._upsert(key, data, set_state=False)
+
+    async def set_state_and_update_data(
+        self, key: StorageKey, state: StateType, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Устанавливает состояние и дополняет данные одним запросом.
+
+        :param key: Ключ хранилища.
+        :param state: Новое состояние.
+        :param data: Данные для слияния с текущими.
+        :return: Данные после обновления.
+        """
+        return await self._upsert(key, data, set_state=True, state=state)
+
+    async def _upsert(
+        self, key: StorageKey, data: Dict[str, Any], set_state: bool, state: StateType = None
+    ) -> Dict[str, Any]:
+        """Сливает данные с текущими и, при необходимости, меняет состояние."""
+        values: Dict[str, Any] = {"key": self.key_builder.build(key), "data": data}
+        if set_state:
+            values["state"] = self._resolve_state(state)
+
+        query = insert(FSMRecord).values(**values)
+        expired = self._expired()
+        query = query.on_conflict_do_update(
+            index_elements=[FSMRecord.key],
+            set_={
+                "state": query.excluded.state if set_state else case((expired, None), else_=FSMRecord.state),
+                "data": case((expired, query.excluded.data), else_=FSMRecord.data.op("||")(query.excluded.data)),
+                "updated_at": func.now(),
+            },
+        ).returning(FSMRecord.data)
+        async with self.engine.begin() as conn:
+            return await conn.scalar(query)
+
+    async def purge_expired(self) -> int:
+        """
+        Удаляет устаревшие записи.
+
+        :return: Количество удаленных записей.
+        """
+        if self.state_ttl is None:
+            return 0
+        async with self.engine.begin() as conn:
+            result = await conn.execute(delete(FSMRecord).where(self._expired()))
+        return result.rowcount
+
+    async def _cleanup_loop(self) -> None:
+        """Периодически удаляет устаревшие записи."""
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.info("Удалено %d устаревших состояний FSM", purged)
+            except Exception as e:
+                logger.error("Ошибка при очистке состояний FSM: %s", e)
+
+    async def start_cleanup(self) -> None:
+        """Запускает фоновую очистку устаревших записей."""
+        if self.state_ttl is not None and self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def close(self) -> None:
+        """Останавливает фоновую очистку. Движок базы данных остается открытым."""
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
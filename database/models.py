@@ -1,6 +1,10 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Text, ForeignKey, Float, BigInteger, DateTime
-from datetime import datetime
+from sqlalchemy import (
+    DDL, String, Text, ForeignKey, ForeignKeyConstraint, Float, BigInteger, Computed, Date, DateTime, Index,
+    UniqueConstraint, event, func, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from datetime import date, datetime
 
 from database.database import Base
 
@@ -22,9 +26,27 @@ class Product(Base):
     description: Mapped[str] = mapped_column(Text)
     price: Mapped[float] = mapped_column(Float, nullable=False)
     category_id: Mapped[int] = mapped_column(ForeignKey('categories.id'))
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     category = relationship("Category", back_populates="products")
 
+    __table_args__ = (
+        Index('ix_products_category_id_id', 'category_id', 'id'),
+        Index('ix_products_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_products_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
+
+event.listen(Product.__table__, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+
 
 class Cart(Base):
     __tablename__ = 'cart'
@@ -33,33 +55,118 @@ class Cart(Base):
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     product_id: Mapped[int] = mapped_column(ForeignKey('products.id'))
     quantity: Mapped[int] = mapped_column(default=1)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
 
     product = relationship("Product")
 
+    __table_args__ = (
+        UniqueConstraint('user_id', 'product_id', name='uq_cart_user_id_product_id'),
+        Index('ix_cart_updated_at', 'updated_at'),
+    )
+
 
 class Order(Base):
     __tablename__ = 'orders'
 
-    id: Mapped[int] = mapped_column(primary_key=True)
+    # Таблица партиционирована по месяцам created_at, поэтому created_at входит в первичный ключ.
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     phone: Mapped[str] = mapped_column(String(20), nullable=False)
     address: Mapped[str] = mapped_column(Text, nullable=False)
     total_cost: Mapped[float] = mapped_column(Float, nullable=False)
     status: Mapped[str] = mapped_column(String(20), default='new')
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, primary_key=True, default=datetime.utcnow, server_default=text("timezone('utc', now())")
+    )
 
     items = relationship("OrderItem", back_populates="order", lazy="joined")
 
+    __table_args__ = (
+        Index('ix_orders_created_at_id', 'created_at', 'id'),
+        Index('ix_orders_status_created_at', 'status', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
 
 class OrderItem(Base):
     __tablename__ = 'order_items'
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey('orders.id'))
+    # Партиционирована по тем же месяцам, что и заказы: order_created_at копирует created_at заказа.
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(index=True)
+    order_created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey('products.id'))
     quantity: Mapped[int] = mapped_column(nullable=False)
     price: Mapped[float] = mapped_column(Float, nullable=False)
 
     order = relationship("Order", back_populates="items")
     product = relationship("Product", lazy="joined")
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['order_id', 'order_created_at'], ['orders.id', 'orders.created_at'], name='fk_order_items_order'
+        ),
+        {'postgresql_partition_by': 'RANGE (order_created_at)'},
+    )
+
+
+class FSMRecord(Base):
+    __tablename__ = 'fsm_states'
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default='{}')
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
+
+
+class OutboxMessage(Base):
+    __tablename__ = 'outbox'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default='{}')
+    dedupe_key: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    attempts: Mapped[int] = mapped_column(nullable=False, server_default='0')
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_outbox_pending', 'available_at', 'id', postgresql_where=text('sent_at IS NULL')),
+        Index('ix_outbox_sent_at', 'sent_at', postgresql_where=text('sent_at IS NOT NULL')),
+    )
+
+
+class SalesDaily(Base):
+    __tablename__ = 'sales_daily'
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders: Mapped[int] = mapped_column(nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+
+class ProductSales(Base):
+    __tablename__ = 'sales_products'
+
+    product_id: Mapped[int] = mapped_column(ForeignKey('products.id'), primary_key=True)
+    quantity: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_sales_products_quantity', 'quantity'),
+    )
+
+
+class OrderStatusCount(Base):
+    __tablename__ = 'order_status_counts'
+
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    orders: Mapped[int] = mapped_column(nullable=False, default=0)
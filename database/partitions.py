@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from database.models import Order, OrderItem
+from utils.export import export_orders
+
+logger = logging.getLogger(__name__)
+
+# Партиционированные таблицы в порядке, в котором создаются их партиции: позиции ссылаются на заказы.
+PARTITIONED_TABLES = ("orders", "order_items")
+# Ключ advisory-блокировки, под которой процессы бота создают и отсоединяют партиции.
+PARTITIONS_LOCK_ID = 7_305_201
+
+
+def month_start(value: date) -> date:
+    """
+    Возвращает первый день месяца.
+
+    :param value: Дата или дата и время.
+    :return: Первый день месяца, в который попадает value.
+    """
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Сдвигает первый день месяца на заданное количество месяцев.
+
+    :param month: Первый день месяца.
+    :param months: Количество месяцев (может быть отрицательным).
+    :return: Первый день полученного месяца.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """
+    Возвращает имя месячной партиции таблицы, например orders_y2026m10.
+
+    :param table: Имя партиционированной таблицы.
+    :param month: Первый день месяца.
+    :return: Имя партиции.
+    """
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+async def create_partitions(conn: AsyncConnection, first: date, last: date) -> list[str]:
+    """
+    Создает недостающие месячные партиции заказов и позиций заказов с first по last включительно.
+
+    Выполняется под advisory-блокировкой транзакции, поэтому несколько процессов могут вызывать ее одновременно.
+
+    :param conn: Соединение с открытой транзакцией.
+    :param first: Первый месяц.
+    :param last: Последний месяц.
+    :return: Имена созданных партиций.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITIONS_LOCK_ID})
+    existing = set(
+        (await conn.scalars(
+            text("SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                 "WHERE n.nspname = current_schema() AND c.relname LIKE ANY(:patterns)"),
+            {"patterns": [f"{table}_y%" for table in PARTITIONED_TABLES]},
+        )).all()
+    )
+    created = []
+    month = month_start(first)
+    while month <= last:
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            await conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+async def get_partition_months(conn: AsyncConnection) -> list[date]:
+    """
+    Возвращает месяцы, для которых к таблице заказов присоединены партиции.
+
+    :param conn: Соединение с базой данных.
+    :return: Первые дни месяцев по возрастанию.
+    """
+    result = await conn.scalars(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'orders'::regclass"
+    ))
+    months = []
+    for name in result:
+        try:
+            months.append(datetime.strptime(name, "orders_y%Ym%m").date())
+        except ValueError:
+            logger.warning("Партиция заказов %s названа не по шаблону и пропущена", name)
+    return sorted(months)
+
+
+async def _detach_partition(conn: AsyncConnection, table: str, partition: str) -> None:
+    """
+    Отсоединяет партицию через DETACH PARTITION ... CONCURRENTLY.
+
+    Если прошлое отсоединение было прервано, оно завершается через FINALIZE. Уже отсоединенная партиция пропускается.
+
+    :param conn: Соединение в режиме AUTOCOMMIT: CONCURRENTLY нельзя выполнять внутри транзакции.
+    :param table: Имя партиционированной таблицы.
+    :param partition: Имя партиции.
+    """
+    pending = await conn.scalar(
+        text("SELECT inhdetachpending FROM pg_inherits "
+             "WHERE inhrelid = to_regclass(:partition) AND inhparent = CAST(:table AS regclass)"),
+        {"partition": partition, "table": table},
+    )
+    if pending is None:
+        return
+    mode = "FINALIZE" if pending else "CONCURRENTLY"
+    await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition} {mode}"))
+
+
+async def archive_partition(engine: AsyncEngine, month: date, directory: str, keep: bool = False) -> tuple[str, int]:
+    """
+    Отсоединяет партиции месяца заказов и выгружает их в сжатый CSV.
+
+    Партиции позиций и заказов отсоединяются через DETACH PARTITION ... CONCURRENTLY: родительские таблицы
+    не блокируются для бота, а отсоединение ждет только транзакции, которые уже работают с ними. У отсоединенной
+    партиции позиций снимается внешний ключ на заказы, иначе партицию заказов нельзя отсоединить. После этого
+    бот больше не может изменить заказы месяца, поэтому выгрузка из отсоединенных таблиц полная.
+
+    Файл сначала пишется под временным именем и переименовывается только после полной выгрузки. Без keep
+    отсоединенные таблицы затем удаляются, с keep остаются обычными таблицами. Если выгрузка не удалась,
+    таблицы остаются в базе.
+
+    :param engine: Асинхронный движок SQLAlchemy.
+    :param month: Первый день архивируемого месяца.
+    :param directory: Каталог для файлов архива.
+    :param keep: Оставить отсоединенные таблицы в базе.
+    :return: Путь к файлу архива и количество записанных строк.
+    """
+    path = os.path.join(directory, f"orders_{month:%Y_%m}.csv.gz")
+    tmp_path = path + ".tmp"
+    orders_partition = partition_name("orders", month)
+    items_partition = partition_name("order_items", month)
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PARTITIONS_LOCK_ID})
+        try:
+            await _detach_partition(conn, "order_items", items_partition)
+            constraints = await conn.scalars(
+                text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) "
+                     "AND contype = 'f' AND confrelid = 'orders'::regclass AND conparentid = 0"),
+                {"table": items_partition},
+            )
+            for name in constraints.all():
+                await conn.execute(text(f'ALTER TABLE {items_partition} DROP CONSTRAINT "{name}"'))
+            await _detach_partition(conn, "orders", orders_partition)
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITIONS_LOCK_ID})
+
+    try:
+        written = await export_orders(
+            engine,
+            tmp_path,
+            orders=Order.__table__.to_metadata(MetaData(), name=orders_partition),
+            order_items=OrderItem.__table__.to_metadata(MetaData(), name=items_partition),
+        )
+    except Exception:
+        logger.error("Выгрузка не удалась, отсоединенные таблицы %s и %s оставлены в базе",
+                     orders_partition, items_partition)
+        raise
+    os.replace(tmp_path, path)
+
+    if not keep:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE {items_partition}"))
+            await conn.execute(text(f"DROP TABLE {orders_partition}"))
+    return path, written
+
+
+class PartitionMaintainer:
+    """
+    Фоновое создание месячных партиций заказов заранее.
+
+    Заказ пишется в партицию текущего месяца, поэтому партиции создаются на months_ahead месяцев вперед.
+    Так вставка не упирается в отсутствующую партицию, даже если бот долго не перезапускался.
+    """
+
+    def __init__(self, engine: AsyncEngine, months_ahead: int, interval: float):
+        """
+        Инициализирует создание партиций.
+
+        :param engine: Асинхронный движок SQLAlchemy.
+        :param months_ahead: На сколько месяцев вперед создавать партиции.
+        :param interval: Интервал между проверками в секундах.
+        """
+        self.engine = engine
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def ensure(self) -> list[str]:
+        """
+        Создает партиции с текущего месяца на months_ahead месяцев вперед.
+
+        :return: Имена созданных партиций.
+        """
+        current = month_start(datetime.utcnow())
+        async with self.engine.begin() as conn:
+            created = await create_partitions(conn, current, add_months(current, self.months_ahead))
+        if created:
+            logger.info("Созданы партиции заказов: %s", ", ".join(created))
+        return created
+
+    async def _run(self) -> None:
+        """Периодически создает недостающие партиции."""
+        while True:
+            try:
+                await self.ensure()
+            except Exception as e:
+                logger.error("Ошибка при создании партиций заказов: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Запускает фоновое создание партиций."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает фоновое создание партиций."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
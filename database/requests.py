@@ -1,68 +1,268 @@
-from typing import Sequence
-
-from sqlalchemy import delete, select, update
+import re
+from datetime import datetime
+from typing import Iterable, Sequence
+
+from sqlalchemy import (
+    CTE,
+    BigInteger,
+    Row,
+    Select,
+    delete,
+    exists,
+    func,
+    literal,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from database.models import Cart, Category, Order, OrderItem, Product
+from config import settings
+from database.cache import MISSING, catalog_cache, catalog_version, search_cache
+from database.catalog_sync import notify_catalog_changed
+from database.models import (
+    Cart,
+    Category,
+    Order,
+    OrderItem,
+    OrderStatusCount,
+    OutboxMessage,
+    Product,
+    ProductSales,
+    SalesDaily,
+)
+
+ORDERS_PAGE_SIZE = 10
+# Статусы заказа в порядке кнопок админ-панели. В callback_data передается индекс статуса в этом списке,
+# поэтому новые статусы добавляются только в конец.
+ORDER_STATUSES = ["Принят", "В обработке", "Отправлен", "Выполнен", "Отменен"]
+# Отмененные заказы не учитываются в выручке и продажах товаров.
+CANCELLED_STATUS = "Отменен"
+PRODUCTS_PAGE_SIZE = 10
+SEARCH_LIMIT = 20
+# Сколько слов запроса учитывать при поиске.
+SEARCH_MAX_WORDS = 5
+
+
+def _detach(session: AsyncSession, objects: Sequence[Category | Product]) -> None:
+    """
+    Отсоединяет объекты от сессии, чтобы их можно было безопасно хранить в общем кэше.
+
+    :param session: Асинхронная сессия базы данных.
+    :param objects: Загруженные объекты каталога.
+    """
+    for obj in objects:
+        session.expunge(obj)
 
 
 async def get_categories(session: AsyncSession) -> Sequence[Category]:
     """
-    Получает все категории из базы данных.
+    Получает все категории, используя кэш каталога.
 
     :param session: Асинхронная сессия базы данных.
     :return: Последовательность объектов Category.
     """
-    query = select(Category)
-    result = await session.execute(query)
-    return result.scalars().all()
+    key = ("categories",)
+    categories = catalog_cache.get(key)
+    if categories is MISSING:
+        query = select(Category)
+        result = await session.execute(query)
+        categories = result.scalars().all()
+        _detach(session, categories)
+        catalog_cache.set(key, categories)
+    return categories
 
 
 async def get_products_by_category(
     session: AsyncSession, category_id: int
 ) -> Sequence[Product]:
     """
-    Получает все товары по ID категории.
+    Получает все товары по ID категории, используя кэш каталога.
 
     :param session: Асинхронная сессия базы данных.
     :param category_id: ID категории.
     :return: Последовательность объектов Product.
     """
-    query = select(Product).where(Product.category_id == category_id)
-    result = await session.execute(query)
-    return result.scalars().all()
+    key = ("products", category_id)
+    products = catalog_cache.get(key)
+    if products is MISSING:
+        query = select(Product).where(Product.category_id == category_id)
+        result = await session.execute(query)
+        products = result.scalars().all()
+        _detach(session, products)
+        catalog_cache.set(key, products)
+    return products
+
+
+async def get_products_page(
+    session: AsyncSession,
+    category_id: int,
+    cursor: int | None = None,
+    backward: bool = False,
+    limit: int = PRODUCTS_PAGE_SIZE,
+) -> tuple[Sequence[Row], bool, bool]:
+    """
+    Получает одну страницу товаров категории с keyset-пагинацией по (category_id, id).
+
+    Каждая страница — ограниченный запрос по индексу ix_products_category_id_id. Выбираются только
+    колонки, нужные для кнопок. Товары упорядочены по возрастанию id.
+
+    :param session: Асинхронная сессия базы данных.
+    :param category_id: ID категории.
+    :param cursor: ID граничного товара или None для первой страницы.
+    :param backward: Если True, загружает страницу с товарами перед курсором.
+    :param limit: Размер страницы.
+    :return: Кортеж (строки с id и name; есть ли предыдущая страница; есть ли следующая).
+    """
+    query = select(Product.id, Product.name).where(Product.category_id == category_id)
+
+    if cursor is None:
+        query = query.order_by(Product.id.asc())
+    elif backward:
+        query = query.where(Product.id < cursor).order_by(Product.id.desc())
+    else:
+        query = query.where(Product.id > cursor).order_by(Product.id.asc())
+
+    result = await session.execute(query.limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if backward:
+        return rows[::-1], has_more, True
+    return rows, cursor is not None, has_more
+
+
+async def count_products_in_category(session: AsyncSession, category_id: int) -> int:
+    """
+    Получает количество товаров в категории, используя кэш каталога.
+
+    :param session: Асинхронная сессия базы данных.
+    :param category_id: ID категории.
+    :return: Количество товаров.
+    """
+    key = ("product_count", category_id)
+    count = catalog_cache.get(key)
+    if count is MISSING:
+        query = select(func.count()).select_from(Product).where(Product.category_id == category_id)
+        count = await session.scalar(query)
+        catalog_cache.set(key, count)
+    return count
 
 
 async def get_product(session: AsyncSession, product_id: int) -> Product | None:
     """
-    Получает конкретный товар по его ID.
+    Получает конкретный товар по его ID, используя кэш каталога.
 
     :param session: Асинхронная сессия базы данных.
     :param product_id: ID товара.
     :return: Объект Product или None, если товар не найден.
     """
-    query = select(Product).where(Product.id == product_id)
-    result = await session.execute(query)
-    return result.scalar_one_or_none()
+    key = ("product", product_id)
+    product = catalog_cache.get(key)
+    if product is MISSING:
+        query = select(Product).where(Product.id == product_id)
+        result = await session.execute(query)
+        product = result.scalar_one_or_none()
+        if product is not None:
+            _detach(session, [product])
+        catalog_cache.set(key, product)
+    return product
+
+
+async def get_products(session: AsyncSession, product_ids: Iterable[int]) -> dict[int, Product]:
+    """
+    Получает несколько товаров по ID, используя кэш каталога. Товары, которых нет в кэше, загружаются одним запросом.
+
+    :param session: Асинхронная сессия базы данных.
+    :param product_ids: ID товаров.
+    :return: Словарь ID товара -> объект Product. Ненайденные товары в него не попадают.
+    """
+    products = {}
+    missing = []
+    for product_id in product_ids:
+        product = catalog_cache.get(("product", product_id))
+        if product is MISSING:
+            missing.append(product_id)
+        elif product is not None:
+            products[product_id] = product
+
+    if missing:
+        result = await session.execute(select(Product).where(Product.id.in_(missing)))
+        loaded = {product.id: product for product in result.scalars()}
+        _detach(session, list(loaded.values()))
+        for product_id in missing:
+            product = loaded.get(product_id)
+            catalog_cache.set(("product", product_id), product)
+            if product is not None:
+                products[product_id] = product
+    return products
+
+
+async def search_products(session: AsyncSession, text: str, limit: int = SEARCH_LIMIT) -> Sequence[Product]:
+    """
+    Ищет товары по названию и описанию, используя кэш результатов поиска.
+
+    Сначала выполняется полнотекстовый поиск по префиксам слов (products.search_vector, GIN-индекс),
+    результаты сортируются по релевантности. Если ничего не найдено, выполняется поиск по триграммному
+    сходству названия (pg_trgm), который находит товары и при опечатках в запросе.
+
+    :param session: Асинхронная сессия базы данных.
+    :param text: Поисковый запрос.
+    :param limit: Максимальное количество результатов.
+    :return: Последовательность найденных объектов Product.
+    """
+    words = re.findall(r"\w+", text.lower())[:SEARCH_MAX_WORDS]
+    if not words:
+        return []
+
+    normalized = " ".join(words)
+    key = (normalized, limit)
+    products = search_cache.get(key)
+    if products is MISSING:
+        ts_query = func.to_tsquery("russian", " & ".join(f"{word}:*" for word in words))
+        query = (
+            select(Product)
+            .where(Product.search_vector.op("@@")(ts_query))
+            .order_by(func.ts_rank(Product.search_vector, ts_query).desc(), Product.id)
+            .limit(limit)
+        )
+        products = (await session.scalars(query)).all()
+        if not products:
+            query = (
+                select(Product)
+                .where(Product.name.op("%")(normalized))
+                .order_by(func.similarity(Product.name, normalized).desc(), Product.id)
+                .limit(limit)
+            )
+            products = (await session.scalars(query)).all()
+        _detach(session, products)
+        search_cache.set(key, products)
+    return products
 
 
 async def add_to_cart(session: AsyncSession, user_id: int, product_id: int) -> None:
     """
     Добавляет товар в корзину пользователя или увеличивает его количество.
 
+    Выполняется одним запросом INSERT ... ON CONFLICT DO UPDATE по уникальному ключу (user_id, product_id).
+
     :param session: Асинхронная сессия базы данных.
     :param user_id: ID пользователя.
     :param product_id: ID товара.
     """
-    query = select(Cart).where(Cart.user_id == user_id, Cart.product_id == product_id)
-    cart_item = await session.scalar(query)
-
-    if cart_item:
-        cart_item.quantity += 1
-    else:
-        session.add(Cart(user_id=user_id, product_id=product_id))
-
+    query = (
+        insert(Cart)
+        .values(user_id=user_id, product_id=product_id, quantity=1)
+        .on_conflict_do_update(
+            constraint="uq_cart_user_id_product_id",
+            set_={"quantity": Cart.quantity + 1, "updated_at": func.now()},
+        )
+    )
+    await session.execute(query)
     await session.commit()
 
 
@@ -118,43 +318,261 @@ async def delete_cart_item(session: AsyncSession, cart_id: int) -> None:
     await session.commit()
 
 
-async def create_order(session: AsyncSession, user_id: int, user_data: dict) -> Order:
+def _select_cart_view(user_id: int, changed: CTE | None = None, removed: CTE | None = None) -> Select:
+    """
+    Строит запрос содержимого корзины, учитывающий изменения из data-modifying CTE.
+
+    PostgreSQL не показывает основному запросу изменения, сделанные в CTE того же выражения,
+    поэтому измененные строки берутся из RETURNING, а удаленные исключаются явно.
+
+    :param user_id: ID пользователя.
+    :param changed: CTE со строками (id, product_id, quantity), вставленными или обновленными в этом запросе.
+    :param removed: CTE с id строк, удаленных в этом запросе.
+    :return: Запрос строк (id, quantity, name, price), упорядоченных по id.
+    """
+    cart = Cart.__table__
+    products = Product.__table__
+
+    current = (
+        select(cart.c.id, cart.c.quantity, products.c.name, products.c.price)
+        .join(products, cart.c.product_id == products.c.id)
+        .where(cart.c.user_id == user_id)
+    )
+    if changed is not None:
+        current = current.where(cart.c.id.not_in(select(changed.c.id)))
+    if removed is not None:
+        current = current.where(cart.c.id.not_in(select(removed.c.id)))
+    if changed is None:
+        return current.order_by(cart.c.id)
+
+    updated = select(changed.c.id, changed.c.quantity, products.c.name, products.c.price).join(
+        products, changed.c.product_id == products.c.id
+    )
+    view = union_all(current, updated).subquery()
+    return select(view).order_by(view.c.id)
+
+
+async def get_cart_view(session: AsyncSession, user_id: int) -> Sequence[Row]:
+    """
+    Получает содержимое корзины одним запросом с данными товаров.
+
+    :param session: Асинхронная сессия базы данных.
+    :param user_id: ID пользователя.
+    :return: Строки с полями id, quantity, name и price.
+    """
+    result = await session.execute(_select_cart_view(user_id))
+    return result.all()
+
+
+async def add_to_cart_returning_cart(session: AsyncSession, user_id: int, product_id: int) -> Sequence[Row]:
+    """
+    Добавляет товар в корзину и возвращает обновленную корзину одним запросом.
+
+    :param session: Асинхронная сессия базы данных.
+    :param user_id: ID пользователя.
+    :param product_id: ID товара.
+    :return: Строки корзины с полями id, quantity, name и price.
+    """
+    cart = Cart.__table__
+    upsert = insert(cart).values(user_id=user_id, product_id=product_id, quantity=1)
+    upserted = (
+        upsert.on_conflict_do_update(
+            constraint="uq_cart_user_id_product_id",
+            set_={"quantity": cart.c.quantity + 1, "updated_at": func.now()},
+        )
+        .returning(cart.c.id, cart.c.product_id, cart.c.quantity)
+        .cte("upserted")
+    )
+    result = await session.execute(_select_cart_view(user_id, changed=upserted))
+    rows = result.all()
+    await session.commit()
+    return rows
+
+
+async def update_cart_item(session: AsyncSession, user_id: int, cart_id: int, action: str) -> Sequence[Row]:
+    """
+    Изменяет строку корзины и возвращает обновленную корзину одним запросом.
+
+    Изменяются только строки, принадлежащие пользователю.
+
+    :param session: Асинхронная сессия базы данных.
+    :param user_id: ID пользователя.
+    :param cart_id: ID записи в корзине.
+    :param action: Действие ('incr', 'decr' или 'del'). При уменьшении до нуля строка удаляется.
+    :return: Строки корзины с полями id, quantity, name и price.
+    :raises ValueError: Если действие неизвестно.
+    """
+    cart = Cart.__table__
+    own_line = (cart.c.id == cart_id) & (cart.c.user_id == user_id)
+    returning = (cart.c.id, cart.c.product_id, cart.c.quantity)
+
+    changed = removed = None
+    if action == "incr":
+        changed = update(cart).where(own_line).values(quantity=cart.c.quantity + 1).returning(*returning).cte("changed")
+    elif action == "decr":
+        changed = (
+            update(cart)
+            .where(own_line, cart.c.quantity > 1)
+            .values(quantity=cart.c.quantity - 1)
+            .returning(*returning)
+            .cte("changed")
+        )
+        removed = delete(cart).where(own_line, cart.c.quantity <= 1).returning(cart.c.id).cte("removed")
+    elif action == "del":
+        removed = delete(cart).where(own_line).returning(cart.c.id).cte("removed")
+    else:
+        raise ValueError(f"Неизвестное действие с корзиной: {action}")
+
+    result = await session.execute(_select_cart_view(user_id, changed=changed, removed=removed))
+    rows = result.all()
+    await session.commit()
+    return rows
+
+
+async def create_order(session: AsyncSession, user_id: int, user_data: dict) -> Order | None:
     """
     Создает новый заказ, переносит в него товары из корзины и очищает корзину.
 
+    Выполняется в одной транзакции фиксированным числом запросов независимо от размера корзины:
+    строки корзины блокируются (SELECT ... FOR UPDATE), заказ создается через INSERT ... SELECT ... RETURNING,
+    товары переносятся одним INSERT ... SELECT, а корзина очищается одним DELETE.
+    В той же транзакции в outbox ставятся уведомления о новом заказе для администраторов из ADMIN_IDS
+    и обновляются витрины продаж (последними запросами, чтобы строки витрин блокировались как можно короче).
+
     :param session: Асинхронная сессия базы данных.
     :param user_id: ID пользователя.
     :param user_data: Данные пользователя (имя, телефон, адрес).
-    :return: Новый созданный объект Order.
-    """
-    cart_items = await get_cart_items(session, user_id)
-    total_cost = sum(item.product.price * item.quantity for item in cart_items)
-
-    new_order = Order(
-        user_id=user_id,
-        name=user_data["name"],
-        phone=user_data["phone"],
-        address=user_data["address"],
-        total_cost=total_cost,
-    )
-    session.add(new_order)
-    await session.flush()
-
-    for item in cart_items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            price=item.product.price,
+    :return: Новый созданный объект Order или None, если корзина пуста.
+    """
+    lock_query = select(Cart.id).where(Cart.user_id == user_id).with_for_update()
+    cart_ids = (await session.scalars(lock_query)).all()
+    if not cart_ids:
+        await session.rollback()
+        return None
+
+    cart_lines = Cart.id.in_(cart_ids)
+
+    order_query = (
+        insert(Order)
+        .from_select(
+            ["user_id", "name", "phone", "address", "total_cost"],
+            select(
+                literal(user_id, BigInteger),
+                literal(user_data["name"]),
+                literal(user_data["phone"]),
+                literal(user_data["address"]),
+                func.sum(Product.price * Cart.quantity),
+            )
+            .select_from(Cart)
+            .join(Product, Cart.product_id == Product.id)
+            .where(cart_lines),
         )
-        session.add(order_item)
-        await session.delete(item)
+        .returning(Order)
+    )
+    new_order = await session.scalar(order_query)
+
+    items_query = insert(OrderItem).from_select(
+        ["order_id", "order_created_at", "product_id", "quantity", "price"],
+        select(literal(new_order.id), literal(new_order.created_at), Cart.product_id, Cart.quantity, Product.price)
+        .select_from(Cart)
+        .join(Product, Cart.product_id == Product.id)
+        .where(cart_lines),
+    )
+    await session.execute(items_query)
+    await session.execute(delete(Cart).where(cart_lines))
+
+    if settings.ADMIN_IDS:
+        payload = {
+            "order_id": new_order.id,
+            "total_cost": new_order.total_cost,
+            "name": new_order.name,
+            "phone": new_order.phone,
+            "address": new_order.address,
+        }
+        notifications = [
+            {
+                "kind": "order_created",
+                "chat_id": admin_id,
+                "payload": payload,
+                "dedupe_key": f"order_created:{new_order.id}:{admin_id}",
+            }
+            for admin_id in settings.ADMIN_IDS
+        ]
+        outbox_query = insert(OutboxMessage).values(notifications).on_conflict_do_nothing(index_elements=["dedupe_key"])
+        await session.execute(outbox_query)
+
+    await _apply_order_sales(session, new_order.id, new_order.created_at, new_order.total_cost, 1)
+    await _shift_status_counts(session, {new_order.status: 1})
 
     await session.commit()
-    await session.refresh(new_order)
     return new_order
 
 
+async def _apply_order_sales(
+    session: AsyncSession, order_id: int, created_at: datetime, total_cost: float, sign: int
+) -> None:
+    """
+    Добавляет заказ в витрины выручки по дням и продаж товаров или вычитает его из них.
+
+    Строки продаж товаров обновляются в порядке product_id, чтобы параллельные заказы с общими товарами
+    блокировали их в одном порядке.
+
+    :param session: Асинхронная сессия базы данных.
+    :param order_id: ID заказа.
+    :param created_at: Дата создания заказа.
+    :param total_cost: Стоимость заказа.
+    :param sign: 1 — добавить заказ, -1 — вычесть (например, при отмене).
+    """
+    daily_query = insert(SalesDaily).values(day=created_at.date(), orders=sign, revenue=sign * total_cost)
+    daily_query = daily_query.on_conflict_do_update(
+        index_elements=[SalesDaily.day],
+        set_={
+            "orders": SalesDaily.orders + daily_query.excluded.orders,
+            "revenue": SalesDaily.revenue + daily_query.excluded.revenue,
+        },
+    )
+    await session.execute(daily_query)
+
+    products_query = insert(ProductSales).from_select(
+        ["product_id", "quantity", "revenue"],
+        select(
+            OrderItem.product_id,
+            sign * func.sum(OrderItem.quantity),
+            sign * func.sum(OrderItem.price * OrderItem.quantity),
+        )
+        .where(OrderItem.order_id == order_id, OrderItem.order_created_at == created_at)
+        .group_by(OrderItem.product_id)
+        .order_by(OrderItem.product_id),
+    )
+    products_query = products_query.on_conflict_do_update(
+        index_elements=[ProductSales.product_id],
+        set_={
+            "quantity": ProductSales.quantity + products_query.excluded.quantity,
+            "revenue": ProductSales.revenue + products_query.excluded.revenue,
+        },
+    )
+    await session.execute(products_query)
+
+
+async def _shift_status_counts(session: AsyncSession, changes: dict[str, int]) -> None:
+    """
+    Изменяет счетчики заказов по статусам.
+
+    Строки обновляются в порядке статусов, чтобы встречные смены статуса (A→B и B→A) не блокировали
+    их в разном порядке и не приводили к взаимной блокировке.
+
+    :param session: Асинхронная сессия базы данных.
+    :param changes: Словарь {статус: изменение счетчика}.
+    """
+    rows = [{"status": status, "orders": delta} for status, delta in sorted(changes.items())]
+    query = insert(OrderStatusCount).values(rows)
+    query = query.on_conflict_do_update(
+        index_elements=[OrderStatusCount.status],
+        set_={"orders": OrderStatusCount.orders + query.excluded.orders},
+    )
+    await session.execute(query)
+
+
 async def add_product(session: AsyncSession, data: dict) -> None:
     """
     Добавляет новый товар в базу данных.
@@ -169,7 +587,13 @@ async def add_product(session: AsyncSession, data: dict) -> None:
         category_id=data["category_id"],
     )
     session.add(product)
+    await notify_catalog_changed(session)
     await session.commit()
+    catalog_cache.invalidate(
+        ("products", product.category_id), ("product_count", product.category_id), ("product", product.id)
+    )
+    search_cache.clear()
+    catalog_version.bump()
 
 
 async def get_orders(session: AsyncSession, status: str | None = None) -> Sequence[Order]:
@@ -189,10 +613,50 @@ async def get_orders(session: AsyncSession, status: str | None = None) -> Sequen
     return result.unique().scalars().all()
 
 
+async def get_orders_page(
+    session: AsyncSession,
+    cursor: tuple[datetime, int] | None = None,
+    backward: bool = False,
+    limit: int = ORDERS_PAGE_SIZE,
+) -> tuple[Sequence[Row], bool, bool]:
+    """
+    Получает одну страницу заказов с keyset-пагинацией по (created_at, id).
+
+    Выбираются только колонки, нужные для списка, поэтому товары заказа
+    не подгружаются. Заказы упорядочены от новых к старым.
+
+    :param session: Асинхронная сессия базы данных.
+    :param cursor: Пара (created_at, id) граничного заказа или None для первой страницы.
+    :param backward: Если True, загружает страницу с более новыми заказами перед курсором.
+    :param limit: Размер страницы.
+    :return: Кортеж (строки с id, created_at и status; есть ли предыдущая страница; есть ли следующая).
+    """
+    key = tuple_(Order.created_at, Order.id)
+    query = select(Order.id, Order.created_at, Order.status)
+
+    if cursor is None:
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    elif backward:
+        query = query.where(key > tuple_(*cursor)).order_by(Order.created_at.asc(), Order.id.asc())
+    else:
+        query = query.where(key < tuple_(*cursor)).order_by(Order.created_at.desc(), Order.id.desc())
+
+    result = await session.execute(query.limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if backward:
+        return rows[::-1], has_more, True
+    return rows, cursor is not None, has_more
+
+
 async def get_order_details(session: AsyncSession, order_id: int) -> Order | None:
     """
     Получает детали конкретного заказа со всеми товарами.
 
+    Заказы из архивированных (отсоединенных) партиций не находятся.
+
     :param session: Асинхронная сессия базы данных.
     :param order_id: ID заказа.
     :return: Объект Order или None, если заказ не найден.
@@ -208,17 +672,85 @@ async def get_order_details(session: AsyncSession, order_id: int) -> Order | Non
 
 async def update_order_status(session: AsyncSession, order_id: int, status: str) -> None:
     """
-    Обновляет статус заказа по его ID.
+    Обновляет статус заказа по его ID, ставит уведомление покупателю в outbox и обновляет витрины продаж.
+
+    Строка заказа блокируется и обновляется одним запросом (SELECT ... FOR UPDATE в CTE + UPDATE ... FROM),
+    который возвращает прежний статус. Если статус не изменился, больше ничего не выполняется. О каждом изменении
+    статуса покупатель получает свое уведомление, в том числе при возврате к прежнему статусу (A → B → A):
+    ключ дедупликации включает ID транзакции, которая изменила статус.
+    Отмена заказа вычитает его из выручки и продаж товаров, а возврат из отмены — добавляет обратно.
 
     :param session: Асинхронная сессия базы данных.
     :param order_id: ID заказа.
     :param status: Новый статус.
     """
-    query = update(Order).where(Order.id == order_id).values(status=status)
-    await session.execute(query)
+    previous = select(Order.id, Order.status).where(Order.id == order_id).with_for_update().cte("previous")
+    query = (
+        update(Order)
+        .where(Order.id == previous.c.id, previous.c.status.is_distinct_from(status))
+        .values(status=status)
+        .returning(Order.user_id, Order.created_at, Order.total_cost, previous.c.status.label("old_status"))
+    )
+    changed = (await session.execute(query)).one_or_none()
+    if changed is None:
+        await session.commit()
+        return
+
+    outbox_query = insert(OutboxMessage).values(
+        kind="order_status",
+        chat_id=changed.user_id,
+        payload={"order_id": order_id, "status": status},
+        dedupe_key=func.concat(f"order_status:{order_id}:", func.pg_current_xact_id()),
+    )
+    await session.execute(outbox_query.on_conflict_do_nothing(index_elements=["dedupe_key"]))
+
+    if status == CANCELLED_STATUS:
+        await _apply_order_sales(session, order_id, changed.created_at, changed.total_cost, -1)
+    elif changed.old_status == CANCELLED_STATUS:
+        await _apply_order_sales(session, order_id, changed.created_at, changed.total_cost, 1)
+
+    changes = {status: 1}
+    if changed.old_status is not None:
+        changes[changed.old_status] = -1
+    await _shift_status_counts(session, changes)
+
     await session.commit()
 
 
+async def get_sales_stats(session: AsyncSession, days: int = 7, top: int = 10) -> dict[str, Sequence[Row]]:
+    """
+    Получает статистику продаж только из витрин, без обращения к таблицам заказов.
+
+    :param session: Асинхронная сессия базы данных.
+    :param days: За сколько последних дней с продажами показать выручку.
+    :param top: Сколько самых продаваемых товаров показать.
+    :return: Словарь со строками 'daily' (day, orders, revenue), 'statuses' (status, orders)
+        и 'top_products' (name, quantity, revenue).
+    """
+    daily_query = (
+        select(SalesDaily.day, SalesDaily.orders, SalesDaily.revenue)
+        .order_by(SalesDaily.day.desc())
+        .limit(days)
+    )
+    statuses_query = (
+        select(OrderStatusCount.status, OrderStatusCount.orders)
+        .where(OrderStatusCount.orders > 0)
+        .order_by(OrderStatusCount.orders.desc())
+    )
+    top_query = (
+        select(Product.name, ProductSales.quantity, ProductSales.revenue)
+        .join(Product, Product.id == ProductSales.product_id)
+        .where(ProductSales.quantity > 0)
+        .order_by(ProductSales.quantity.desc())
+        .limit(top)
+    )
+    return {
+        "daily": (await session.execute(daily_query)).all(),
+        "statuses": (await session.execute(statuses_query)).all(),
+        "top_products": (await session.execute(top_query)).all(),
+    }
+
+
 async def add_category(session: AsyncSession, name: str) -> Category:
     """
     Добавляет новую категорию в базу данных.
@@ -229,8 +761,11 @@ async def add_category(session: AsyncSession, name: str) -> Category:
     """
     new_category = Category(name=name)
     session.add(new_category)
+    await notify_catalog_changed(session)
     await session.commit()
     await session.refresh(new_category)
+    catalog_cache.invalidate(("categories",))
+    catalog_version.bump()
     return new_category
 
 
@@ -242,11 +777,14 @@ async def delete_category(session: AsyncSession, category_id: int) -> bool:
     :param category_id: ID удаляемой категории.
     :return: True, если категория удалена, иначе False.
     """
-    products_in_category = await get_products_by_category(session, category_id)
-    if products_in_category:
+    has_products = await session.scalar(select(exists().where(Product.category_id == category_id)))
+    if has_products:
         return False
 
     query = delete(Category).where(Category.id == category_id)
     await session.execute(query)
+    await notify_catalog_changed(session)
     await session.commit()
+    catalog_cache.invalidate(("categories",), ("products", category_id), ("product_count", category_id))
+    catalog_version.bump()
     return True
@@ -1,31 +1,43 @@
 import logging
+import os
+import tempfile
+from datetime import date
 
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message
-from sqlalchemy.exc import IntegrityError
+from aiogram.types import CallbackQuery, FSInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from FSM.add_product import AddCategoryStates, AddProductStates
+from FSM.add_product import AddProductStates
+from FSM.context import set_state_with_data
 from config import settings
+from database.database import engine
 from database.requests import (
-    add_category,
+    ORDER_STATUSES,
     add_product,
-    delete_category,
     get_categories,
     get_order_details,
-    get_orders,
+    get_orders_page,
+    get_sales_stats,
     update_order_status,
 )
 from keyboards.inline import (
-    get_category_delete_keyboard,
     get_category_keyboard,
-    get_category_management_keyboard,
     get_orders_keyboard,
     get_status_keyboard,
 )
 from keyboards.reply import get_admin_keyboard
+from utils.callbacks import (
+    ADMIN_ORDER,
+    ORDER_STATUS,
+    ORDERS_PAGE,
+    PRODUCT_CATEGORY,
+    TO_ORDERS,
+    callback_dispatcher,
+)
+from utils.export import export_orders
+from utils.pagination import decode_order_cursor
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -54,33 +66,33 @@ async def start_add_product_handler(message: Message, state: FSMContext) -> None
 @router.message(F.text == "Список заказов")
 async def list_orders_handler(message: Message, session: AsyncSession) -> None:
     """
-    Отображает список всех заказов.
+    Отображает первую страницу списка заказов.
     """
     try:
-        orders = await get_orders(session)
+        orders, has_prev, has_next = await get_orders_page(session)
         if not orders:
             await message.answer("На данный момент заказов нет.")
             return
 
-        keyboard = get_orders_keyboard(orders)
+        keyboard = get_orders_keyboard(orders, has_prev, has_next)
         await message.answer("Список заказов:", reply_markup=keyboard)
     except Exception as e:
         logger.error("Ошибка в list_orders_handler для пользователя %d: %s", message.from_user.id, e)
         await message.answer("Не удалось загрузить список заказов.")
 
 
-@router.callback_query(F.data == "to_orders")
+@callback_dispatcher.handler(TO_ORDERS)
 async def to_orders_handler(callback: CallbackQuery, session: AsyncSession) -> None:
     """
     Обрабатывает нажатие кнопки 'Назад к заказам'.
     """
     try:
-        orders = await get_orders(session)
+        orders, has_prev, has_next = await get_orders_page(session)
         if not orders:
             await callback.message.edit_text("На данный момент заказов нет.")
             return
 
-        keyboard = get_orders_keyboard(orders)
+        keyboard = get_orders_keyboard(orders, has_prev, has_next)
         await callback.message.edit_text("Список заказов:", reply_markup=keyboard)
     except Exception as e:
         logger.error("Ошибка в to_orders_handler для пользователя %d: %s", callback.from_user.id, e)
@@ -89,14 +101,39 @@ async def to_orders_handler(callback: CallbackQuery, session: AsyncSession) -> N
         await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_order_"))
-async def view_order_details_handler(callback: CallbackQuery, session: AsyncSession) -> None:
+@callback_dispatcher.handler(ORDERS_PAGE)
+async def orders_page_handler(callback: CallbackQuery, backward: bool, cursor_str: str, session: AsyncSession) -> None:
     """
-    Отображает детали конкретного заказа.
+    Обрабатывает переключение страниц списка заказов.
     """
     try:
-        order_id = int(callback.data.split("_")[2])
+        cursor = decode_order_cursor(cursor_str)
 
+        orders, has_prev, has_next = await get_orders_page(session, cursor, backward=backward)
+        if not orders:
+            orders, has_prev, has_next = await get_orders_page(session)
+        if not orders:
+            await callback.message.edit_text("На данный момент заказов нет.")
+            return
+
+        keyboard = get_orders_keyboard(orders, has_prev, has_next)
+        await callback.message.edit_text("Список заказов:", reply_markup=keyboard)
+    except (IndexError, ValueError) as e:
+        logger.warning("Неверные callback-данные для orders_page: %s. Ошибка: %s", callback.data, e)
+        await callback.answer("Произошла ошибка.", show_alert=True)
+    except Exception as e:
+        logger.error("Ошибка в orders_page_handler для пользователя %d: %s", callback.from_user.id, e)
+        await callback.answer("Не удалось загрузить список заказов.", show_alert=True)
+    finally:
+        await callback.answer()
+
+
+@callback_dispatcher.handler(ADMIN_ORDER)
+async def view_order_details_handler(callback: CallbackQuery, order_id: int, session: AsyncSession) -> None:
+    """
+    Отображает детали конкретного заказа.
+    """
+    try:
         order = await get_order_details(session, order_id)
         if not order:
             await callback.answer("Заказ не найден.", show_alert=True)
@@ -116,9 +153,6 @@ async def view_order_details_handler(callback: CallbackQuery, session: AsyncSess
 
         keyboard = get_status_keyboard(order_id)
         await callback.message.answer(details_text, reply_markup=keyboard)
-    except (IndexError, ValueError) as e:
-        logger.warning("Неверные callback-данные для view_order_details: %s. Ошибка: %s", callback.data, e)
-        await callback.answer("Произошла ошибка.", show_alert=True)
     except Exception as e:
         logger.error("Ошибка в view_order_details_handler для пользователя %d: %s", callback.from_user.id, e)
         await callback.answer("Не удалось загрузить детали заказа.", show_alert=True)
@@ -126,14 +160,17 @@ async def view_order_details_handler(callback: CallbackQuery, session: AsyncSess
         await callback.answer()
 
 
-@router.callback_query(F.data.startswith("status_"))
-async def change_order_status_handler(callback: CallbackQuery, session: AsyncSession) -> None:
+@callback_dispatcher.handler(ORDER_STATUS)
+async def change_order_status_handler(
+    callback: CallbackQuery, order_id: int, status_index: int, session: AsyncSession
+) -> None:
     """
     Изменяет статус заказа.
     """
     try:
-        _, order_id_str, new_status = callback.data.split("_")
-        order_id = int(order_id_str)
+        if not 0 <= status_index < len(ORDER_STATUSES):
+            raise IndexError(f"Индекс статуса вне диапазона: {status_index}")
+        new_status = ORDER_STATUSES[status_index]
         logger.info("Пользователь %d изменил статус заказа %d на '%s'", callback.from_user.id, order_id, new_status)
 
         await update_order_status(session, order_id, new_status)
@@ -155,7 +192,7 @@ async def change_order_status_handler(callback: CallbackQuery, session: AsyncSes
 
             keyboard = get_status_keyboard(order_id)
             await callback.message.edit_text(details_text, reply_markup=keyboard)
-    except (IndexError, ValueError) as e:
+    except IndexError as e:
         logger.warning("Неверные callback-данные для change_order_status: %s. Ошибка: %s", callback.data, e)
         await callback.answer("Произошла ошибка.", show_alert=True)
     except Exception as e:
@@ -163,19 +200,82 @@ async def change_order_status_handler(callback: CallbackQuery, session: AsyncSes
         await callback.answer("Не удалось изменить статус заказа.", show_alert=True)
 
 
+@router.message(F.text == "Статистика")
+async def sales_stats_handler(message: Message, session: AsyncSession) -> None:
+    """
+    Отображает статистику продаж: выручку по дням, заказы по статусам и самые продаваемые товары.
+
+    Данные читаются только из витрин продаж.
+    """
+    try:
+        stats = await get_sales_stats(session)
+
+        text = "<b>Выручка по дням:</b>\n"
+        for row in stats["daily"]:
+            text += f"{row.day.strftime('%d.%m.%y')}: {row.revenue:.2f} руб. ({row.orders} заказов)\n"
+        if not stats["daily"]:
+            text += "Пока нет продаж.\n"
+
+        text += "\n<b>Заказы по статусам:</b>\n"
+        for row in stats["statuses"]:
+            text += f"{row.status}: {row.orders}\n"
+
+        text += "\n<b>Самые продаваемые товары:</b>\n"
+        for position, row in enumerate(stats["top_products"], start=1):
+            text += f"{position}. {row.name} — {row.quantity} шт. ({row.revenue:.2f} руб.)\n"
+
+        await message.answer(text)
+    except Exception as e:
+        logger.error("Ошибка в sales_stats_handler для пользователя %d: %s", message.from_user.id, e)
+        await message.answer("Не удалось загрузить статистику. Попробуйте снова позже.")
+
+
+@router.message(Command("export_orders"))
+async def export_orders_handler(message: Message, command: CommandObject) -> None:
+    """
+    Обрабатывает команду /export_orders [с ГГГГ-ММ-ДД] [по ГГГГ-ММ-ДД].
+
+    Выгружает заказы за период в CSV (gzip) и отправляет файл документом. Доступна только администраторам
+    из ADMIN_IDS.
+    """
+    if message.from_user.id not in settings.ADMIN_IDS:
+        await message.answer("У вас нет доступа к этой функции.")
+        return
+
+    try:
+        dates = [date.fromisoformat(value) for value in (command.args or "").split()]
+        date_from, date_to = (dates + [None, None])[:2]
+    except ValueError:
+        await message.answer("Укажите даты в формате ГГГГ-ММ-ДД, например: /export_orders 2026-09-01 2026-09-30")
+        return
+
+    fd, path = tempfile.mkstemp(prefix="orders_", suffix=".csv.gz")
+    os.close(fd)
+    try:
+        written = await export_orders(engine, path, date_from, date_to)
+        logger.info("Пользователь %d выгрузил %d строк заказов", message.from_user.id, written)
+        await message.answer_document(
+            FSInputFile(path, filename="orders.csv.gz"),
+            caption=f"Выгрузка заказов: {written} строк.",
+        )
+    except Exception as e:
+        logger.error("Ошибка в export_orders_handler для пользователя %d: %s", message.from_user.id, e)
+        await message.answer("Не удалось выгрузить заказы. Попробуйте снова позже.")
+    finally:
+        os.remove(path)
+
+
 @router.message(AddProductStates.enter_name)
 async def enter_product_name_handler(message: Message, state: FSMContext) -> None:
     """Обрабатывает ввод названия товара."""
-    await state.update_data(name=message.text)
-    await state.set_state(AddProductStates.enter_description)
+    await set_state_with_data(state, AddProductStates.enter_description, name=message.text)
     await message.answer("Теперь введите описание товара:")
 
 
 @router.message(AddProductStates.enter_description)
 async def enter_product_description_handler(message: Message, state: FSMContext) -> None:
     """Обрабатывает ввод описания товара."""
-    await state.update_data(description=message.text)
-    await state.set_state(AddProductStates.enter_price)
+    await set_state_with_data(state, AddProductStates.enter_price, description=message.text)
     await message.answer("Введите цену товара (в рублях, можно с копейками):")
 
 
@@ -184,8 +284,7 @@ async def enter_product_price_handler(message: Message, state: FSMContext, sessi
     """Обрабатывает ввод цены товара."""
     try:
         price = float(message.text)
-        await state.update_data(price=price)
-        await state.set_state(AddProductStates.select_category)
+        await set_state_with_data(state, AddProductStates.select_category, price=price)
 
         categories = await get_categories(session)
         keyboard = get_category_keyboard(categories, admin_mode=True)
@@ -198,108 +297,19 @@ async def enter_product_price_handler(message: Message, state: FSMContext, sessi
         await message.answer("Произошла ошибка. Попробуйте снова.")
 
 
-@router.callback_query(AddProductStates.select_category, F.data.startswith("admin_category_"))
-async def select_product_category_handler(callback: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+@callback_dispatcher.handler(PRODUCT_CATEGORY, state=AddProductStates.select_category)
+async def select_product_category_handler(
+    callback: CallbackQuery, category_id: int, state: FSMContext, session: AsyncSession
+) -> None:
     """Обрабатывает выбор категории и завершает добавление товара."""
     try:
-        category_id = int(callback.data.split("_")[2])
-        await state.update_data(category_id=category_id)
-
-        data = await state.get_data()
+        data = await state.update_data(category_id=category_id)
         await add_product(session, data)
         await callback.message.answer("Товар успешно добавлен!")
         logger.info("Пользователь %d успешно добавил новый товар: %s", callback.from_user.id, data['name'])
         await state.clear()
-    except (IndexError, ValueError) as e:
-        logger.warning("Неверные callback-данные для select_product_category: %s. Ошибка: %s", callback.data, e)
-        await callback.answer("Произошла ошибка.", show_alert=True)
     except Exception as e:
         logger.error("Ошибка в select_product_category_handler для пользователя %d: %s", callback.from_user.id, e)
         await callback.answer("Не удалось добавить товар. Попробуйте снова.", show_alert=True)
     finally:
         await callback.answer()
-
-
-@router.message(F.text == "Управление категориями")
-@router.callback_query(F.data == "manage_categories")
-async def manage_categories_handler(update: Message | CallbackQuery, session: AsyncSession) -> None:
-    """
-    Отображает меню управления категориями.
-    """
-    categories = await get_categories(session)
-    keyboard = get_category_management_keyboard(categories)
-    text = "Категории в базе данных:" if categories else "В базе данных пока нет категорий."
-
-    if isinstance(update, Message):
-        await update.answer(text, reply_markup=keyboard)
-    elif isinstance(update, CallbackQuery):
-        await update.message.edit_text(text, reply_markup=keyboard)
-        await update.answer()
-
-
-@router.callback_query(F.data == "admin_category_add")
-async def start_add_category_handler(callback: CallbackQuery, state: FSMContext) -> None:
-    """
-    Запускает FSM для добавления новой категории.
-    """
-    await state.set_state(AddCategoryStates.enter_name)
-    await callback.message.edit_text("Введите название новой категории:")
-    await callback.answer()
-
-
-@router.message(AddCategoryStates.enter_name)
-async def enter_category_name_handler(message: Message, state: FSMContext, session: AsyncSession) -> None:
-    """
-    Обрабатывает ввод названия новой категории и сохраняет ее.
-    """
-    try:
-        new_category = await add_category(session, message.text)
-        await message.answer(f"Категория «{new_category.name}» успешно добавлена!")
-        await state.clear()
-        await manage_categories_handler(message, session)
-    except IntegrityError:
-        await message.answer("Такая категория уже существует. Пожалуйста, введите другое название.")
-    except Exception as e:
-        logger.error("Ошибка при добавлении категории: %s", e)
-        await message.answer("Произошла ошибка при добавлении категории. Попробуйте снова.")
-        await state.clear()
-
-
-@router.callback_query(F.data == "admin_category_delete_menu")
-async def show_delete_category_menu(callback: CallbackQuery, session: AsyncSession) -> None:
-    """
-    Отображает меню для выбора категории для удаления.
-    """
-    categories = await get_categories(session)
-    if not categories:
-        await callback.answer("Нет категорий для удаления.", show_alert=True)
-        return
-
-    keyboard = get_category_delete_keyboard(categories)
-    await callback.message.edit_text("Выберите категорию для удаления:", reply_markup=keyboard)
-    await callback.answer()
-
-
-@router.callback_query(F.data.startswith("admin_category_del_"))
-async def delete_category_handler(callback: CallbackQuery, session: AsyncSession) -> None:
-    """
-    Удаляет выбранную категорию.
-    """
-    try:
-        category_id = int(callback.data.split("_")[3])
-        deleted = await delete_category(session, category_id)
-
-        if deleted:
-            await callback.answer("Категория успешно удалена.", show_alert=True)
-        else:
-            await callback.answer(
-                "Нельзя удалить категорию, так как в ней есть товары.",
-                show_alert=True,
-            )
-
-        await manage_categories_handler(callback, session)
-    except (IndexError, ValueError):
-        await callback.answer("Ошибка! Неверный ID категории.", show_alert=True)
-    except Exception as e:
-        logger.error("Ошибка при удалении категории: %s", e)
-        await callback.answer("Произошла ошибка при удалении.", show_alert=True)
@@ -1,43 +1,41 @@
 import logging
-from typing import Tuple
+from typing import Sequence, Tuple
 
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from FSM.checkout import CheckoutStates
+from database.cart_store import cart_store
 from database.requests import (
-    add_to_cart,
-    delete_cart_item,
-    get_cart_items,
-    update_cart_quantity,
+    add_to_cart_returning_cart,
+    get_cart_view,
+    update_cart_item,
 )
 from keyboards.inline import get_cart_keyboard
+from utils.callbacks import CART_ADD, CART_UPDATE, callback_dispatcher
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 
-async def render_cart(
-        session: AsyncSession, user_id: int
-) -> Tuple[str, InlineKeyboardMarkup | None]:
+def format_cart(cart_items: Sequence[Row]) -> Tuple[str, InlineKeyboardMarkup | None]:
     """
-    Формирует и отображает содержимое корзины и клавиатуру для пользователя.
+    Формирует текст корзины и клавиатуру из уже загруженных строк корзины.
 
-    :param session: Асинхронная сессия базы данных.
-    :param user_id: ID пользователя.
+    :param cart_items: Строки корзины с полями id, quantity, name и price.
     :return: Кортеж с текстом корзины и соответствующей клавиатурой (или None, если корзина пуста).
     """
-    cart_items = await get_cart_items(session, user_id)
-
     if not cart_items:
         return "Ваша корзина пуста.", None
 
     total_cost = 0
     cart_text = "<b>Ваша корзина:</b>\n\n"
     for item in cart_items:
-        item_cost = item.product.price * item.quantity
-        cart_text += f"▪️ {item.product.name}\n"
+        item_cost = item.price * item.quantity
+        cart_text += f"▪️ {item.name}\n"
         cart_text += f"   - Цена: {item_cost} руб.\n\n"
         total_cost += item_cost
 
@@ -46,6 +44,23 @@ async def render_cart(
     return cart_text, keyboard
 
 
+async def render_cart(
+        session: AsyncSession, user_id: int
+) -> Tuple[str, InlineKeyboardMarkup | None]:
+    """
+    Формирует и отображает содержимое корзины и клавиатуру для пользователя.
+
+    :param session: Асинхронная сессия базы данных.
+    :param user_id: ID пользователя.
+    :return: Кортеж с текстом корзины и соответствующей клавиатурой (или None, если корзина пуста).
+    """
+    if cart_store is not None:
+        cart_items = await cart_store.get_cart_view(session, user_id)
+    else:
+        cart_items = await get_cart_view(session, user_id)
+    return format_cart(cart_items)
+
+
 @router.message(F.text == "Корзина")
 async def cart_handler(message: Message, session: AsyncSession) -> None:
     """
@@ -61,28 +76,23 @@ async def cart_handler(message: Message, session: AsyncSession) -> None:
         await message.answer("Не удалось отобразить корзину. Попробуйте снова позже.")
 
 
-@router.callback_query(F.data.startswith("cart_add_"))
-async def add_to_cart_handler(callback: CallbackQuery, session: AsyncSession) -> None:
+@callback_dispatcher.handler(CART_ADD)
+async def add_to_cart_handler(callback: CallbackQuery, product_id: int, session: AsyncSession) -> None:
     """
     Обрабатывает добавление товара в корзину.
     """
     try:
-        product_id = int(callback.data.split("_")[2])
         user_id = callback.from_user.id
         logger.info("Пользователь %d добавляет товар %d в корзину", user_id, product_id)
 
-        await add_to_cart(session, user_id, product_id)
+        if cart_store is not None:
+            cart_items = await cart_store.add(session, user_id, product_id)
+        else:
+            cart_items = await add_to_cart_returning_cart(session, user_id, product_id)
         await callback.answer("Товар добавлен в корзину!")
 
-        cart_text, keyboard = await render_cart(session, user_id)
+        cart_text, keyboard = format_cart(cart_items)
         await callback.message.answer(cart_text, reply_markup=keyboard)
-    except (IndexError, ValueError) as e:
-        logger.warning(
-            "Неверные callback-данные для add_to_cart: %s. Ошибка: %s",
-            callback.data,
-            e,
-        )
-        await callback.answer("Произошла ошибка при добавлении товара.", show_alert=True)
     except Exception as e:
         logger.error(
             "Ошибка в add_to_cart_handler для пользователя %d: %s",
@@ -94,32 +104,28 @@ async def add_to_cart_handler(callback: CallbackQuery, session: AsyncSession) ->
         )
 
 
-@router.callback_query(F.data.startswith("cart_"))
+@callback_dispatcher.handler(CART_UPDATE)
 async def cart_action_handler(
-        callback: CallbackQuery, session: AsyncSession, state: FSMContext
+        callback: CallbackQuery, action: str, item_id: int, session: AsyncSession, state: FSMContext
 ) -> None:
     """
     Обрабатывает действия с товарами в корзине (увеличение, уменьшение, удаление).
     """
-    current_state = await state.get_state()
-    if current_state is not None:
+    if await state.get_state() in CheckoutStates.__all_states_names__:
         await callback.answer("Пожалуйста, завершите оформление заказа.", show_alert=True)
         return
 
     try:
-        _, action, item_id_str = callback.data.split("_")
-        item_id = int(item_id_str)
-
-        if action == "del":
-            await delete_cart_item(session, item_id)
-        elif action in ["incr", "decr"]:
-            await update_cart_quantity(session, item_id, action)
+        if cart_store is not None:
+            cart_items = await cart_store.update(session, callback.from_user.id, item_id, action)
+        else:
+            cart_items = await update_cart_item(session, callback.from_user.id, item_id, action)
 
-        cart_text, keyboard = await render_cart(session, callback.from_user.id)
+        cart_text, keyboard = format_cart(cart_items)
         await callback.message.edit_text(cart_text, reply_markup=keyboard)
-    except (IndexError, ValueError) as e:
+    except ValueError as e:
         logger.warning(
-            "Неверные callback-данные для cart_action: %s. Ошибка: %s",
+            "Неверное действие с корзиной: %s. Ошибка: %s",
             callback.data,
             e,
         )
@@ -12,13 +12,20 @@ from keyboards.inline import (
     get_category_delete_keyboard,
     get_category_management_keyboard,
 )
+from utils.callbacks import (
+    CATEGORY_ADD,
+    CATEGORY_DELETE,
+    CATEGORY_DELETE_MENU,
+    MANAGE_CATEGORIES,
+    callback_dispatcher,
+)
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 
 @router.message(F.text == "Управление категориями")
-@router.callback_query(F.data == "manage_categories")
+@callback_dispatcher.handler(MANAGE_CATEGORIES)
 async def manage_categories_handler(update: Message | CallbackQuery, session: AsyncSession) -> None:
     """
     Отображает меню управления категориями.
@@ -34,7 +41,7 @@ async def manage_categories_handler(update: Message | CallbackQuery, session: As
         await update.answer()
 
 
-@router.callback_query(F.data == "admin_category_add")
+@callback_dispatcher.handler(CATEGORY_ADD)
 async def start_add_category_handler(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Запускает FSM для добавления новой категории.
@@ -63,7 +70,7 @@ async def enter_category_name_handler(message: Message, state: FSMContext, sessi
         await state.clear()
 
 
-@router.callback_query(F.data == "admin_category_delete_menu")
+@callback_dispatcher.handler(CATEGORY_DELETE_MENU)
 async def show_delete_category_menu(callback: CallbackQuery, session: AsyncSession) -> None:
     """
     Отображает меню для выбора категории для удаления.
@@ -78,13 +85,12 @@ async def show_delete_category_menu(callback: CallbackQuery, session: AsyncSessi
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_category_del_"))
-async def delete_category_handler(callback: CallbackQuery, session: AsyncSession) -> None:
+@callback_dispatcher.handler(CATEGORY_DELETE)
+async def delete_category_handler(callback: CallbackQuery, category_id: int, session: AsyncSession) -> None:
     """
     Удаляет выбранную категорию.
     """
     try:
-        category_id = int(callback.data.split("_")[3])
         deleted = await delete_category(session, category_id)
 
         if deleted:
@@ -97,8 +103,6 @@ async def delete_category_handler(callback: CallbackQuery, session: AsyncSession
 
         # Обновляем меню управления
         await manage_categories_handler(callback, session)
-    except (IndexError, ValueError):
-        await callback.answer("Ошибка! Неверный ID категории.", show_alert=True)
     except Exception as e:
         logger.error("Ошибка при удалении категории: %s", e)
         await callback.answer("Произошла ошибка при удалении.", show_alert=True)
@@ -1,18 +1,21 @@
 import logging
 
-from aiogram import F, Router
+from aiogram import Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from FSM.checkout import CheckoutStates
+from FSM.context import set_state_with_data
+from database.cart_store import cart_store
 from database.requests import create_order, get_cart_items
+from utils.callbacks import ORDER_CREATE, callback_dispatcher
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 
-@router.callback_query(F.data == "order_create")
+@callback_dispatcher.handler(ORDER_CREATE)
 async def start_checkout_handler(callback: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
     """
     Запускает процесс оформления заказа.
@@ -20,7 +23,10 @@ async def start_checkout_handler(callback: CallbackQuery, state: FSMContext, ses
     Проверяет, не пуста ли корзина, и устанавливает первое состояние для ввода имени.
     """
     try:
-        cart_items = await get_cart_items(session, callback.from_user.id)
+        if cart_store is not None:
+            cart_items = await cart_store.get_cart_view(session, callback.from_user.id)
+        else:
+            cart_items = await get_cart_items(session, callback.from_user.id)
         if not cart_items:
             await callback.answer("Ваша корзина пуста, нечего оформлять.", show_alert=True)
             return
@@ -39,8 +45,7 @@ async def enter_name_handler(message: Message, state: FSMContext) -> None:
     """
     Обрабатывает ввод имени пользователя.
     """
-    await state.update_data(name=message.text)
-    await state.set_state(CheckoutStates.enter_phone)
+    await set_state_with_data(state, CheckoutStates.enter_phone, name=message.text)
     await message.answer("Отлично! Теперь введите ваш номер телефона:")
 
 
@@ -49,8 +54,7 @@ async def enter_phone_handler(message: Message, state: FSMContext) -> None:
     """
     Обрабатывает ввод номера телефона пользователя.
     """
-    await state.update_data(phone=message.text)
-    await state.set_state(CheckoutStates.enter_address)
+    await set_state_with_data(state, CheckoutStates.enter_address, phone=message.text)
     await message.answer("И последний шаг! Введите ваш адрес доставки:")
 
 
@@ -60,10 +64,17 @@ async def enter_address_handler(message: Message, state: FSMContext, session: As
     Обрабатывает ввод адреса и завершает оформление заказа.
     """
     try:
-        await state.update_data(address=message.text)
-        user_data = await state.get_data()
+        user_data = await state.update_data(address=message.text)
 
+        if cart_store is not None:
+            await cart_store.flush(message.from_user.id)
         order = await create_order(session, message.from_user.id, user_data)
+        if cart_store is not None:
+            cart_store.forget(message.from_user.id)
+        if order is None:
+            await message.answer("Ваша корзина пуста, нечего оформлять.")
+            await state.clear()
+            return
 
         await message.answer(
             f"Спасибо за заказ! Ваш заказ <b>№{order.id}</b> успешно оформлен.\n"
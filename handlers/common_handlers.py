@@ -2,9 +2,10 @@ import logging
 
 from aiogram import Router, F
 from aiogram.filters import CommandStart
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message
 
 from keyboards.reply import get_user_keyboard
+from utils.callbacks import NOOP, callback_dispatcher
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -28,10 +29,18 @@ async def command_start_handler(message: Message) -> None:
         await message.answer("Произошла ошибка при запуске. Попробуйте снова позже.")
 
 
-@router.message(F.text.in_(["Добавить товар", "Список заказов", "Управление категориями"]))
+@router.message(F.text.in_(["Добавить товар", "Список заказов", "Управление категориями", "Статистика"]))
 async def non_admin_access_handler(message: Message) -> None:
     """
     Обрабатывает попытку не-администратора использовать админские команды.
     """
     logger.warning("Пользователь %d попытался использовать админскую команду: %s", message.from_user.id, message.text)
     await message.answer("У вас нет доступа к этой функции.")
+
+
+@callback_dispatcher.handler(NOOP)
+async def noop_handler(callback: CallbackQuery) -> None:
+    """
+    Обрабатывает нажатие на кнопки, которые только отображают информацию (номер страницы, количество товара).
+    """
+    await callback.answer()
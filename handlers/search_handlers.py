@@ -0,0 +1,128 @@
+import html
+import logging
+
+from aiogram import Bot, F, Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.filters import Command, CommandObject, CommandStart
+from aiogram.fsm.context import FSMContext
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent, Message
+from aiogram.utils.deep_linking import create_start_link
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from FSM.search import SearchStates
+from database.requests import search_products
+from keyboards.inline import get_open_in_bot_keyboard, get_search_results_keyboard
+from utils.views import format_product_card, get_product_card_view
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+# Сколько секунд Telegram может кэшировать ответ на инлайн-запрос.
+INLINE_CACHE_TIME = 30
+# Кнопки главного меню, которые не должны восприниматься как поисковый запрос.
+MENU_BUTTONS = {"Каталог", "Корзина", "Поиск"}
+
+
+async def _answer_search(message: Message, session: AsyncSession, text: str) -> None:
+    """Ищет товары и отправляет результаты в виде инлайн-клавиатуры."""
+    products = await search_products(session, text)
+    if not products:
+        await message.answer("По вашему запросу ничего не найдено. Попробуйте изменить запрос.")
+        return
+    await message.answer(
+        f"Результаты поиска по запросу «{html.escape(text)}»:", reply_markup=get_search_results_keyboard(products)
+    )
+
+
+@router.message(F.text == "Поиск")
+async def start_search_handler(message: Message, state: FSMContext) -> None:
+    """
+    Обрабатывает нажатие кнопки 'Поиск'.
+
+    Переводит FSM в состояние ввода поискового запроса.
+    """
+    await state.set_state(SearchStates.enter_query)
+    await message.answer("Введите название или описание товара:")
+
+
+@router.message(SearchStates.enter_query, F.text.in_(MENU_BUTTONS) | F.text.startswith("/"))
+async def leave_search_handler(message: Message, state: FSMContext) -> None:
+    """
+    Выходит из режима поиска, если вместо запроса нажата кнопка меню или отправлена команда.
+
+    Сбрасывает состояние и передает сообщение дальше, чтобы его обработал соответствующий хендлер.
+    """
+    await state.clear()
+    raise SkipHandler()
+
+
+@router.message(SearchStates.enter_query, F.text, ~F.text.in_(MENU_BUTTONS), ~F.text.startswith("/"))
+async def search_query_handler(message: Message, state: FSMContext, session: AsyncSession) -> None:
+    """
+    Обрабатывает введенный поисковый запрос.
+    """
+    try:
+        await state.clear()
+        await _answer_search(message, session, message.text)
+    except Exception as e:
+        logger.error("Ошибка в search_query_handler для пользователя %d: %s", message.from_user.id, e)
+        await message.answer("Не удалось выполнить поиск. Попробуйте снова позже.")
+
+
+@router.message(Command("search"))
+async def search_command_handler(message: Message, command: CommandObject, session: AsyncSession) -> None:
+    """
+    Обрабатывает команду /search <запрос>.
+    """
+    if not command.args:
+        await message.answer("Укажите запрос после команды, например: /search чай")
+        return
+    try:
+        await _answer_search(message, session, command.args)
+    except Exception as e:
+        logger.error("Ошибка в search_command_handler для пользователя %d: %s", message.from_user.id, e)
+        await message.answer("Не удалось выполнить поиск. Попробуйте снова позже.")
+
+
+@router.message(CommandStart(deep_link=True, magic=F.args.regexp(r"^product_\d+$")))
+async def product_deep_link_handler(message: Message, command: CommandObject, session: AsyncSession) -> None:
+    """
+    Обрабатывает переход по ссылке /start product_<id> из сообщения, отправленного в инлайн-режиме.
+
+    Отображает карточку товара.
+    """
+    try:
+        view = await get_product_card_view(session, int(command.args.split("_")[1]))
+        if view is None:
+            await message.answer("Товар не найден.")
+            return
+
+        await message.answer(view.text, reply_markup=view.reply_markup)
+    except Exception as e:
+        logger.error("Ошибка в product_deep_link_handler для пользователя %d: %s", message.from_user.id, e)
+        await message.answer("Не удалось загрузить товар. Попробуйте снова позже.")
+
+
+@router.inline_query()
+async def inline_search_handler(inline_query: InlineQuery, bot: Bot, session: AsyncSession) -> None:
+    """
+    Обрабатывает инлайн-запрос @бот <запрос>.
+
+    Возвращает найденные товары; выбранный товар отправляется в чат карточкой со ссылкой на бота.
+    """
+    try:
+        products = await search_products(session, inline_query.query)
+        results = [
+            InlineQueryResultArticle(
+                id=str(product.id),
+                title=product.name,
+                description=f"{product.price} руб.",
+                input_message_content=InputTextMessageContent(message_text=format_product_card(product)),
+                reply_markup=get_open_in_bot_keyboard(await create_start_link(bot, f"product_{product.id}")),
+            )
+            for product in products
+        ]
+        await inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
+    except Exception as e:
+        logger.error("Ошибка в inline_search_handler для пользователя %d: %s", inline_query.from_user.id, e)
+        await inline_query.answer([], cache_time=0)
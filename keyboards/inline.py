@@ -1,9 +1,30 @@
-from typing import Sequence
+from typing import Any, Sequence
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from database.models import Cart, Category, Order, Product
+from database.models import Category, Product
+from database.requests import ORDER_STATUSES
+from utils.callbacks import (
+    ADMIN_ORDER,
+    CART_ADD,
+    CART_UPDATE,
+    CATEGORY,
+    CATEGORY_ADD,
+    CATEGORY_DELETE,
+    CATEGORY_DELETE_MENU,
+    MANAGE_CATEGORIES,
+    NOOP,
+    ORDER_CREATE,
+    ORDER_STATUS,
+    ORDERS_PAGE,
+    PRODUCT,
+    PRODUCT_CATEGORY,
+    PRODUCTS_PAGE,
+    TO_CATALOG,
+    TO_ORDERS,
+)
+from utils.pagination import encode_order_cursor
 
 
 def get_category_keyboard(categories: Sequence[Category], admin_mode: bool = False) -> InlineKeyboardMarkup:
@@ -11,29 +32,81 @@ def get_category_keyboard(categories: Sequence[Category], admin_mode: bool = Fal
     Генерирует инлайн-клавиатуру со списком категорий.
 
     :param categories: Список объектов категорий.
-    :param admin_mode: Если True, добавляет специальный префикс в callback_data для админских хендлеров.
+    :param admin_mode: Если True, кнопки выбирают категорию для нового товара в админ-панели.
     :return: Сгенерированная клавиатура.
     """
     builder = InlineKeyboardBuilder()
     for category in categories:
-        callback_data = f"admin_category_{category.id}" if admin_mode else f"category_{category.id}"
+        callback_data = PRODUCT_CATEGORY.pack(category.id) if admin_mode else CATEGORY.pack(category.id)
         builder.add(InlineKeyboardButton(text=category.name, callback_data=callback_data))
     builder.adjust(2)
     return builder.as_markup()
 
 
-def get_products_keyboard(products: Sequence[Product]) -> InlineKeyboardMarkup:
+def get_products_keyboard(
+    products: Sequence[Any],
+    category_id: int,
+    page: int = 1,
+    pages: int = 1,
+    has_prev: bool = False,
+    has_next: bool = False,
+) -> InlineKeyboardMarkup:
     """
-    Генерирует инлайн-клавиатуру со списком товаров.
+    Генерирует инлайн-клавиатуру со страницей товаров категории.
 
-    :param products: Список объектов товаров.
+    :param products: Строки товаров с полями id и name.
+    :param category_id: ID категории (для кнопок навигации).
+    :param page: Номер текущей страницы.
+    :param pages: Общее количество страниц.
+    :param has_prev: Есть ли предыдущая страница (кнопка '⬅️').
+    :param has_next: Есть ли следующая страница (кнопка '➡️').
     :return: Сгенерированная клавиатура.
     """
     builder = InlineKeyboardBuilder()
     for product in products:
-        builder.add(InlineKeyboardButton(text=product.name, callback_data=f"product_{product.id}"))
-    builder.add(InlineKeyboardButton(text="Назад к категориям", callback_data="to_catalog"))
-    builder.adjust(1)  # 1 кнопка в ряду
+        builder.row(InlineKeyboardButton(text=product.name, callback_data=PRODUCT.pack(product.id)))
+
+    navigation = []
+    if has_prev and products:
+        callback_data = PRODUCTS_PAGE.pack(category_id, products[0].id, True, page)
+        navigation.append(InlineKeyboardButton(text="⬅️", callback_data=callback_data))
+    if has_prev or has_next:
+        navigation.append(InlineKeyboardButton(text=f"{page}/{pages}", callback_data=NOOP.pack()))
+    if has_next and products:
+        callback_data = PRODUCTS_PAGE.pack(category_id, products[-1].id, False, page)
+        navigation.append(InlineKeyboardButton(text="➡️", callback_data=callback_data))
+    if navigation:
+        builder.row(*navigation)
+
+    builder.row(InlineKeyboardButton(text="Назад к категориям", callback_data=TO_CATALOG.pack()))
+    return builder.as_markup()
+
+
+def get_search_results_keyboard(products: Sequence[Product]) -> InlineKeyboardMarkup:
+    """
+    Генерирует инлайн-клавиатуру с результатами поиска товаров.
+
+    :param products: Список найденных товаров.
+    :return: Сгенерированная клавиатура.
+    """
+    builder = InlineKeyboardBuilder()
+    for product in products:
+        text = f"{product.name} — {product.price} руб."
+        builder.add(InlineKeyboardButton(text=text, callback_data=PRODUCT.pack(product.id)))
+    builder.add(InlineKeyboardButton(text="В каталог", callback_data=TO_CATALOG.pack()))
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_open_in_bot_keyboard(url: str) -> InlineKeyboardMarkup:
+    """
+    Генерирует инлайн-клавиатуру со ссылкой для открытия товара в боте (для сообщений из инлайн-режима).
+
+    :param url: Ссылка вида https://t.me/<бот>?start=product_<id>.
+    :return: Сгенерированная клавиатура.
+    """
+    builder = InlineKeyboardBuilder()
+    builder.add(InlineKeyboardButton(text="Открыть в боте", url=url))
     return builder.as_markup()
 
 
@@ -46,43 +119,56 @@ def get_product_card_keyboard(product_id: int, category_id: int) -> InlineKeyboa
     :return: Сгенерированная клавиатура.
     """
     builder = InlineKeyboardBuilder()
-    builder.add(InlineKeyboardButton(text="Добавить в корзину", callback_data=f"cart_add_{product_id}"))
-    builder.add(InlineKeyboardButton(text="Назад к товарам", callback_data=f"category_{category_id}"))
+    builder.add(InlineKeyboardButton(text="Добавить в корзину", callback_data=CART_ADD.pack(product_id)))
+    builder.add(InlineKeyboardButton(text="Назад к товарам", callback_data=CATEGORY.pack(category_id)))
     return builder.as_markup()
 
 
-def get_cart_keyboard(cart_items: Sequence[Cart]) -> InlineKeyboardMarkup:
+def get_cart_keyboard(cart_items: Sequence[Any]) -> InlineKeyboardMarkup:
     """
     Генерирует инлайн-клавиатуру для корзины покупок.
 
-    :param cart_items: Список объектов товаров в корзине.
+    :param cart_items: Строки корзины с полями id и quantity.
     :return: Сгенерированная клавиатура.
     """
     builder = InlineKeyboardBuilder()
     for item in cart_items:
         builder.row(
-            InlineKeyboardButton(text="-", callback_data=f"cart_decr_{item.id}"),
-            InlineKeyboardButton(text=f"{item.quantity} шт.", callback_data="noop"),
-            InlineKeyboardButton(text="+", callback_data=f"cart_incr_{item.id}"),
-            InlineKeyboardButton(text="❌", callback_data=f"cart_del_{item.id}"),
+            InlineKeyboardButton(text="-", callback_data=CART_UPDATE.pack("decr", item.id)),
+            InlineKeyboardButton(text=f"{item.quantity} шт.", callback_data=NOOP.pack()),
+            InlineKeyboardButton(text="+", callback_data=CART_UPDATE.pack("incr", item.id)),
+            InlineKeyboardButton(text="❌", callback_data=CART_UPDATE.pack("del", item.id)),
         )
-    builder.row(InlineKeyboardButton(text="Оформить заказ", callback_data="order_create"))
-    builder.row(InlineKeyboardButton(text="Назад в каталог", callback_data="to_catalog"))
+    builder.row(InlineKeyboardButton(text="Оформить заказ", callback_data=ORDER_CREATE.pack()))
+    builder.row(InlineKeyboardButton(text="Назад в каталог", callback_data=TO_CATALOG.pack()))
     return builder.as_markup()
 
 
-def get_orders_keyboard(orders: Sequence[Order]) -> InlineKeyboardMarkup:
+def get_orders_keyboard(orders: Sequence[Any], has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
     """
-    Генерирует инлайн-клавиатуру со списком заказов для админ-панели.
+    Генерирует инлайн-клавиатуру со страницей заказов для админ-панели.
 
-    :param orders: Список объектов заказов.
+    :param orders: Строки заказов с полями id, created_at и status.
+    :param has_prev: Есть ли более новые заказы (кнопка '⬅️').
+    :param has_next: Есть ли более старые заказы (кнопка '➡️').
     :return: Сгенерированная клавиатура.
     """
     builder = InlineKeyboardBuilder()
     for order in orders:
         text = f"Заказ №{order.id} от {order.created_at.strftime('%d.%m.%y')} ({order.status})"
-        builder.add(InlineKeyboardButton(text=text, callback_data=f"admin_order_{order.id}"))
-    builder.adjust(1)
+        builder.row(InlineKeyboardButton(text=text, callback_data=ADMIN_ORDER.pack(order.id)))
+
+    navigation = []
+    if has_prev and orders:
+        first = orders[0]
+        cursor = encode_order_cursor(first.created_at, first.id)
+        navigation.append(InlineKeyboardButton(text="⬅️", callback_data=ORDERS_PAGE.pack(True, cursor)))
+    if has_next and orders:
+        last = orders[-1]
+        cursor = encode_order_cursor(last.created_at, last.id)
+        navigation.append(InlineKeyboardButton(text="➡️", callback_data=ORDERS_PAGE.pack(False, cursor)))
+    if navigation:
+        builder.row(*navigation)
     return builder.as_markup()
 
 
@@ -93,11 +179,10 @@ def get_status_keyboard(order_id: int) -> InlineKeyboardMarkup:
     :param order_id: ID заказа.
     :return: Сгенерированная клавиатура.
     """
-    statuses = ["Принят", "В обработке", "Отправлен", "Выполнен", "Отменен"]
     builder = InlineKeyboardBuilder()
-    for status in statuses:
-        builder.add(InlineKeyboardButton(text=status, callback_data=f"status_{order_id}_{status}"))
-    builder.add(InlineKeyboardButton(text="Назад к заказам", callback_data="to_orders"))
+    for index, status in enumerate(ORDER_STATUSES):
+        builder.add(InlineKeyboardButton(text=status, callback_data=ORDER_STATUS.pack(order_id, index)))
+    builder.add(InlineKeyboardButton(text="Назад к заказам", callback_data=TO_ORDERS.pack()))
     builder.adjust(2, 2, 1)
     return builder.as_markup()
 
@@ -111,11 +196,11 @@ def get_category_management_keyboard(categories: Sequence[Category]) -> InlineKe
     """
     builder = InlineKeyboardBuilder()
     for category in categories:
-        builder.add(InlineKeyboardButton(text=category.name, callback_data="noop"))  # Просто для отображения
+        builder.add(InlineKeyboardButton(text=category.name, callback_data=NOOP.pack()))  # Просто для отображения
     builder.adjust(2)
     builder.row(
-        InlineKeyboardButton(text="➕ Добавить", callback_data="admin_category_add"),
-        InlineKeyboardButton(text="❌ Удалить", callback_data="admin_category_delete_menu"),
+        InlineKeyboardButton(text="➕ Добавить", callback_data=CATEGORY_ADD.pack()),
+        InlineKeyboardButton(text="❌ Удалить", callback_data=CATEGORY_DELETE_MENU.pack()),
     )
     return builder.as_markup()
 
@@ -129,7 +214,7 @@ def get_category_delete_keyboard(categories: Sequence[Category]) -> InlineKeyboa
     """
     builder = InlineKeyboardBuilder()
     for category in categories:
-        builder.add(InlineKeyboardButton(text=f"❌ {category.name}", callback_data=f"admin_category_del_{category.id}"))
+        builder.add(InlineKeyboardButton(text=f"❌ {category.name}", callback_data=CATEGORY_DELETE.pack(category.id)))
     builder.adjust(2)
-    builder.row(InlineKeyboardButton(text="Назад", callback_data="manage_categories"))
+    builder.row(InlineKeyboardButton(text="Назад", callback_data=MANAGE_CATEGORIES.pack()))
     return builder.as_markup()
@@ -13,7 +13,7 @@ def get_admin_keyboard() -> ReplyKeyboardMarkup:
                 KeyboardButton(text="Добавить товар"),
                 KeyboardButton(text="Список заказов"),
             ],
-            [KeyboardButton(text="Управление категориями")],
+            [KeyboardButton(text="Управление категориями"), KeyboardButton(text="Статистика")],
         ],
         resize_keyboard=True,
     )
@@ -26,6 +26,9 @@ def get_user_keyboard() -> ReplyKeyboardMarkup:
     :return: Сгенерированная клавиатура пользователя.
     """
     return ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="Каталог"), KeyboardButton(text="Корзина")]],
+        keyboard=[
+            [KeyboardButton(text="Каталог"), KeyboardButton(text="Корзина")],
+            [KeyboardButton(text="Поиск")],
+        ],
         resize_keyboard=True,
     )
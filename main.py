@@ -1,12 +1,18 @@
 import asyncio
 import logging
+import signal
+from multiprocessing.queues import Queue
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from config import settings
-from database.database import async_session_factory
+from database.cart_store import cart_store
+from database.cart_sweeper import CartSweeper
+from database.catalog_sync import CatalogSyncListener
+from database.database import async_session_factory, engine
+from database.fsm_storage import PostgresStorage
+from database.partitions import PartitionMaintainer
 from handlers import (
     admin_handlers,
     cart_handlers,
@@ -14,27 +20,39 @@ from handlers import (
     category_management_handlers,
     checkout_handlers,
     common_handlers,
+    search_handlers,
 )
-from middlewares.db import DbSessionMiddleware
+from middlewares.db import DbSessionMiddleware, ReleaseDbConnectionMiddleware
+from middlewares.metrics import setup_metrics
+from middlewares.ordering import OrderedExecutionMiddleware
+from middlewares.outbound import OutboundScheduler, RateLimitMiddleware
+from utils.callbacks import callback_dispatcher
 from utils.commands import set_commands
+from utils.metrics import start_metrics_server
+from utils.notifications import OutboxDispatcher
+from utils.supervisor import consume_updates, get_worker_metrics_port, run_supervisor
+from utils.webhook import run_webhook
 
 
-async def main() -> None:
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+
+def create_bot() -> Bot:
     """
-    Основная функция для запуска бота.
+    Создает экземпляр бота.
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-    )
-    logger = logging.getLogger(__name__)
+    return Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
 
-    storage = MemoryStorage()
-    bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
-    dp = Dispatcher(storage=storage)
 
-    dp.update.middleware(DbSessionMiddleware(session_pool=async_session_factory))
+def include_routers(dp: Dispatcher) -> None:
+    """
+    Подключает роутеры обработчиков к диспетчеру.
 
+    :param dp: Диспетчер.
+    """
+    dp.include_router(callback_dispatcher.router)
+    # Поиск подключается раньше остальных роутеров, чтобы сбросить режим поиска до обработки команд и кнопок меню.
+    dp.include_router(search_handlers.router)
     dp.include_router(admin_handlers.router)
     dp.include_router(category_management_handlers.router)
     dp.include_router(common_handlers.router)
@@ -42,11 +60,184 @@ async def main() -> None:
     dp.include_router(cart_handlers.router)
     dp.include_router(checkout_handlers.router)
 
+
+def create_dispatcher(bot: Bot, workers: int = 1) -> Dispatcher:
+    """
+    Создает диспетчер с хранилищем FSM, middleware, роутерами и фоновыми задачами.
+
+    :param bot: Экземпляр бота.
+    :param workers: Количество процессов, между которыми делится общий лимит отправки сообщений.
+    :return: Диспетчер.
+    """
+    storage = PostgresStorage(
+        engine,
+        state_ttl=settings.FSM_STATE_TTL,
+        cleanup_interval=settings.FSM_CLEANUP_INTERVAL,
+    )
+    bot.session.middleware(ReleaseDbConnectionMiddleware())
+    dp = Dispatcher(storage=storage)
+    if settings.OUTBOUND_RATE_LIMIT:
+        outbound_scheduler = OutboundScheduler(
+            global_rate=settings.OUTBOUND_GLOBAL_RATE / workers,
+            chat_rate=settings.OUTBOUND_CHAT_RATE,
+            chat_burst=settings.OUTBOUND_CHAT_BURST,
+            group_rate=settings.OUTBOUND_GROUP_RATE,
+        )
+        bot.session.middleware(RateLimitMiddleware(outbound_scheduler, settings.OUTBOUND_MAX_RETRIES))
+        dp.shutdown.register(outbound_scheduler.close)
+
+    outbox_dispatcher = OutboxDispatcher(
+        engine,
+        bot,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        concurrency=settings.OUTBOX_CONCURRENCY,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL,
+        lease=settings.OUTBOX_LEASE,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        retention=settings.OUTBOX_RETENTION,
+        prune_interval=settings.OUTBOX_PRUNE_INTERVAL,
+    )
+    dp.startup.register(outbox_dispatcher.start)
+    dp.shutdown.register(outbox_dispatcher.close)
+    dp.startup.register(storage.start_cleanup)
+    if cart_store is not None:
+        dp.startup.register(cart_store.start)
+        dp.shutdown.register(cart_store.close)
+
+    cart_sweeper = CartSweeper(
+        engine,
+        ttl=settings.CART_TTL,
+        interval=settings.CART_SWEEP_INTERVAL,
+        batch_size=settings.CART_SWEEP_BATCH_SIZE,
+        pause=settings.CART_SWEEP_PAUSE,
+    )
+    dp.startup.register(cart_sweeper.start)
+    dp.shutdown.register(cart_sweeper.close)
+
+    catalog_sync_listener = CatalogSyncListener(engine)
+    dp.startup.register(catalog_sync_listener.start)
+    dp.shutdown.register(catalog_sync_listener.close)
+
+    partition_maintainer = PartitionMaintainer(
+        engine,
+        months_ahead=settings.ORDER_PARTITIONS_AHEAD,
+        interval=settings.ORDER_PARTITIONS_INTERVAL,
+    )
+    dp.startup.register(partition_maintainer.start)
+    dp.shutdown.register(partition_maintainer.close)
+
+    # Очередь апдейтов пользователя должна стоять перед загрузкой состояния FSM, иначе апдейт
+    # прочитает состояние до того, как его изменит предыдущий апдейт того же пользователя.
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(
+        OrderedExecutionMiddleware(settings.update_concurrency, settings.USER_QUEUE_LIMIT)
+    )
+    dp.update.outer_middleware(dp.fsm)
+    dp.update.middleware(DbSessionMiddleware(session_pool=async_session_factory))
+    if settings.METRICS_ENABLED:
+        setup_metrics(dp, bot, engine)
+
+    include_routers(dp)
+    return dp
+
+
+async def main() -> None:
+    """
+    Основная функция для запуска бота.
+    """
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    logger = logging.getLogger(__name__)
+
+    bot = create_bot()
+    dp = create_dispatcher(bot)
+
     await set_commands(bot)
 
+    metrics_runner = None
+    if settings.METRICS_ENABLED:
+        metrics_runner = await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
+
     logger.info("Запуск бота...")
     try:
-        await dp.start_polling(bot)
+        if settings.USE_WEBHOOK:
+            await run_webhook(dp, bot)
+        else:
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await bot.session.close()
+        logger.info("Бот остановлен.")
+
+
+async def worker_main(index: int, queue: Queue) -> None:
+    """
+    Основная функция процесса-обработчика в многопроцессном режиме.
+
+    Обрабатывает апдейты, которые супервизор кладет в очередь процесса.
+
+    :param index: Номер процесса.
+    :param queue: Очередь апдейтов процесса.
+    """
+    bot = create_bot()
+    dp = create_dispatcher(bot, workers=settings.WORKERS)
+
+    metrics_runner = None
+    if settings.METRICS_ENABLED:
+        metrics_runner = await start_metrics_server(settings.METRICS_HOST, get_worker_metrics_port(index))
+
+    await dp.emit_startup(bot=bot, bots=[bot], dispatcher=dp)
+    try:
+        await consume_updates(
+            dp,
+            bot,
+            queue,
+            max_pending=settings.WORKER_MAX_PENDING,
+            shutdown_timeout=settings.WORKER_SHUTDOWN_TIMEOUT,
+        )
+    finally:
+        await dp.emit_shutdown(bot=bot, bots=[bot], dispatcher=dp)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await bot.session.close()
+
+
+def run_worker(index: int, queue: Queue) -> None:
+    """
+    Точка входа процесса-обработчика.
+
+    SIGINT игнорируется: процесс останавливается, когда супервизор присылает в очередь None.
+
+    :param index: Номер процесса.
+    :param queue: Очередь апдейтов процесса.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format=f"%(processName)s - {LOG_FORMAT}")
+    asyncio.run(worker_main(index, queue))
+
+
+async def supervisor_main() -> None:
+    """
+    Основная функция супервизора в многопроцессном режиме.
+
+    Запускает WORKERS процессов-обработчиков и распределяет между ними апдейты по ID пользователя.
+    """
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    logger = logging.getLogger(__name__)
+
+    # Супервизор сам апдейты не обрабатывает, поэтому типы апдейтов берутся только из роутеров,
+    # без хранилища FSM, middleware и фоновых задач.
+    routers = Dispatcher()
+    include_routers(routers)
+    allowed_updates = routers.resolve_used_update_types()
+
+    bot = create_bot()
+    await set_commands(bot)
+
+    logger.info("Запуск бота в многопроцессном режиме...")
+    try:
+        await run_supervisor(bot, allowed_updates, run_worker, settings.WORKERS)
     finally:
         await bot.session.close()
         logger.info("Бот остановлен.")
@@ -54,6 +245,6 @@ async def main() -> None:
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(supervisor_main() if settings.WORKERS > 1 else main())
     except (KeyboardInterrupt, SystemExit):
         logging.info("Бот остановлен пользователем.")
@@ -1,8 +1,119 @@
+import logging
+import time
+from contextvars import ContextVar
 from typing import Any, Awaitable, Callable, Dict
 
-from aiogram import BaseMiddleware
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+current_session: ContextVar["LazySession | None"] = ContextVar("current_session", default=None)
+
+
+class LazySession:
+    """
+    Прокси для AsyncSession, который создает сессию только при первом обращении.
+
+    Учитывает, сколько раз за апдейт бралось соединение из пула и сколько времени оно удерживалось.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker):
+        """
+        Инициализирует прокси.
+
+        :param session_pool: Фабрика асинхронных сессий SQLAlchemy.
+        """
+        self._session_pool = session_pool
+        self._session: AsyncSession | None = None
+        self._acquired_at: float | None = None
+        # True, если в текущей транзакции выполнялись INSERT, UPDATE или DELETE (в том числе через session.execute,
+        # которые не отражаются в new/dirty/deleted).
+        self.has_writes = False
+        self.connections_used = 0
+        self.connection_time = 0.0
+
+    @property
+    def used(self) -> bool:
+        """True, если за время апдейта бралось соединение с базой данных."""
+        return self.connections_used > 0
+
+    def _get_session(self) -> AsyncSession:
+        """Возвращает сессию, создавая ее при первом обращении."""
+        if self._session is None:
+            self._session = self._session_pool()
+            self._session.sync_session.info["lazy_session"] = self
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_session(), name)
+
+    def _on_connection_acquired(self) -> None:
+        """Фиксирует момент получения соединения из пула."""
+        self.connections_used += 1
+        self._acquired_at = time.perf_counter()
+
+    def _on_connection_released(self) -> None:
+        """Фиксирует время удержания соединения после его возврата в пул."""
+        self.has_writes = False
+        if self._acquired_at is not None:
+            self.connection_time += time.perf_counter() - self._acquired_at
+            self._acquired_at = None
+
+    async def release(self) -> None:
+        """
+        Завершает открытую читающую транзакцию, чтобы вернуть соединение в пул.
+
+        Ничего не делает, если в транзакции уже выполнялась запись или в сессии есть несброшенные изменения:
+        такую транзакцию фиксирует или откатывает сам хендлер.
+        """
+        session = self._session
+        if session is None or not session.in_transaction():
+            return
+        if self.has_writes or session.new or session.dirty or session.deleted:
+            return
+        await session.commit()
+
+    async def close(self) -> None:
+        """Закрывает сессию, если она была создана."""
+        if self._session is not None:
+            await self._session.close()
+
+
+@event.listens_for(Session, "after_begin")
+def _on_after_begin(session: Session, transaction: SessionTransaction, connection: Any) -> None:
+    lazy_session = session.info.get("lazy_session")
+    if lazy_session is not None:
+        lazy_session._on_connection_acquired()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_do_orm_execute(orm_execute_state: ORMExecuteState) -> None:
+    lazy_session = orm_execute_state.session.info.get("lazy_session")
+    if lazy_session is not None and (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        lazy_session.has_writes = True
+
+
+@event.listens_for(Session, "after_flush")
+def _on_after_flush(session: Session, flush_context: Any) -> None:
+    lazy_session = session.info.get("lazy_session")
+    if lazy_session is not None:
+        lazy_session.has_writes = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _on_after_transaction_end(session: Session, transaction: SessionTransaction) -> None:
+    lazy_session = session.info.get("lazy_session")
+    if lazy_session is not None and transaction.parent is None:
+        lazy_session._on_connection_released()
 
 
 class DbSessionMiddleware(BaseMiddleware):
@@ -28,9 +139,38 @@ class DbSessionMiddleware(BaseMiddleware):
         """
         Выполняет middleware.
 
-        Открывает сессию из пула, добавляет ее в данные, вызывает хендлер
-        и гарантирует закрытие сессии.
+        Передает в хендлер ленивую сессию, которая берет соединение из пула только при первом запросе,
+        и гарантирует ее закрытие.
         """
-        async with self.session_pool() as session:
-            data["session"] = session
+        session = LazySession(self.session_pool)
+        data["session"] = session
+        token = current_session.set(session)
+        try:
             return await handler(event, data)
+        finally:
+            current_session.reset(token)
+            await session.close()
+            if session.used and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Соединение с БД бралось %d раз и удерживалось %.3f с",
+                    session.connections_used,
+                    session.connection_time,
+                )
+
+
+class ReleaseDbConnectionMiddleware(BaseRequestMiddleware):
+    """
+    Middleware запросов к Bot API, которое возвращает соединение текущего апдейта в пул
+    перед каждым вызовом, чтобы оно не удерживалось во время сетевого запроса.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        session = current_session.get()
+        if session is not None:
+            await session.release()
+        return await make_request(bot, method)
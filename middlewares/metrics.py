@@ -0,0 +1,149 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.metrics import (
+    BOT_API_ERRORS,
+    BOT_API_LATENCY,
+    HANDLER_DB_TIME,
+    HANDLER_ERRORS,
+    HANDLER_LATENCY,
+    HANDLER_SQL_STATEMENTS,
+)
+
+
+class UpdateMetrics:
+    """
+    Данные об обработке одного апдейта, которые собираются по ходу его выполнения.
+    """
+
+    __slots__ = ("router", "handler", "statements", "db_time")
+
+    def __init__(self):
+        self.router = "unhandled"
+        self.handler = "unhandled"
+        self.statements = 0
+        self.db_time = 0.0
+
+
+current_update_metrics: ContextVar[UpdateMetrics | None] = ContextVar("current_update_metrics", default=None)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Внешний middleware апдейтов, который измеряет время обработки, ошибки и работу с базой данных.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        metrics = UpdateMetrics()
+        token = current_update_metrics.set(metrics)
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(metrics.router, metrics.handler).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            current_update_metrics.reset(token)
+            HANDLER_LATENCY.labels(metrics.router, metrics.handler).observe(elapsed)
+            HANDLER_SQL_STATEMENTS.labels(metrics.router, metrics.handler).observe(metrics.statements)
+            HANDLER_DB_TIME.labels(metrics.router, metrics.handler).observe(metrics.db_time)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware событий, который запоминает, какой хендлер обработал апдейт.
+
+    Роутером считается модуль, в котором объявлен хендлер.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        metrics = current_update_metrics.get()
+        handler_object = data.get("handler")
+        if metrics is not None and handler_object is not None:
+            callback = handler_object.callback
+            metrics.router = callback.__module__.rsplit(".", 1)[-1]
+            metrics.handler = callback.__name__
+        return await handler(event, data)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Middleware запросов к Bot API, который измеряет их время и считает ошибки.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        method_name = type(method).__name__
+        started_at = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            BOT_API_ERRORS.labels(method_name).inc()
+            raise
+        finally:
+            BOT_API_LATENCY.labels(method_name).observe(time.perf_counter() - started_at)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if current_update_metrics.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    metrics = current_update_metrics.get()
+    started = conn.info.get("query_started_at")
+    if metrics is not None and started:
+        metrics.statements += 1
+        metrics.db_time += time.perf_counter() - started.pop()
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    started = connection.info.get("query_started_at") if connection is not None else None
+    if started:
+        started.pop()
+
+
+def setup_metrics(dp: Dispatcher, bot: Bot, engine: AsyncEngine) -> None:
+    """
+    Подключает сбор метрик к диспетчеру, боту и движку базы данных.
+
+    :param dp: Диспетчер aiogram.
+    :param bot: Экземпляр бота.
+    :param engine: Асинхронный движок SQLAlchemy.
+    """
+    dp.update.outer_middleware(MetricsMiddleware())
+    handler_name_middleware = HandlerNameMiddleware()
+    for event_name, observer in dp.observers.items():
+        if event_name not in ("update", "error"):
+            observer.middleware(handler_name_middleware)
+
+    bot.session.middleware(BotApiMetricsMiddleware())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
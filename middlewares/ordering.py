@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.metrics import UPDATE_QUEUE_WAIT, UPDATES_DROPPED, UPDATES_IN_FLIGHT, UPDATES_WAITING
+
+logger = logging.getLogger(__name__)
+
+
+class _UpdateSlot:
+    """Общий слот, занятый апдейтом. Его можно временно вернуть, пока апдейт только ждет."""
+
+    __slots__ = ("semaphore", "held")
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self.held = False
+
+    async def acquire(self) -> None:
+        """Дожидается свободного слота."""
+        UPDATES_WAITING.inc()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            UPDATES_WAITING.dec()
+        self.held = True
+
+    def release(self) -> None:
+        """Возвращает слот, если он занят."""
+        if self.held:
+            self.held = False
+            self.semaphore.release()
+
+
+current_slot: ContextVar[_UpdateSlot | None] = ContextVar("current_slot", default=None)
+
+
+@asynccontextmanager
+async def update_slot_released() -> AsyncIterator[None]:
+    """
+    Возвращает общий слот текущего апдейта на время блока и снова занимает его после.
+
+    Используется там, где хендлер только ждет (например, разрешения на отправку сообщения в Bot API),
+    чтобы ожидание не занимало слоты, нужные апдейтам других пользователей.
+    """
+    slot = current_slot.get()
+    if slot is None or not slot.held:
+        yield
+        return
+
+    slot.release()
+    try:
+        yield
+    finally:
+        await slot.acquire()
+
+
+class _UserQueue:
+    """Очередь апдейтов одного пользователя: блокировка и количество апдейтов, которые ее держат или ждут."""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class OrderedExecutionMiddleware(BaseMiddleware):
+    """
+    Внешний middleware апдейтов, который выполняет апдейты одного пользователя строго по очереди,
+    а апдейты разных пользователей — параллельно, но не больше max_concurrency одновременно.
+
+    Апдейт сначала ждет завершения предыдущих апдейтов своего пользователя, и только затем — свободного
+    общего слота, поэтому очередь одного пользователя не занимает слоты, нужные другим. Апдейты без
+    пользователя и чата ограничиваются только общим лимитом. На время ожидания отправки в Bot API
+    (см. update_slot_released) апдейт возвращает свой слот.
+    """
+
+    def __init__(self, max_concurrency: int, user_queue_limit: int):
+        """
+        Инициализирует middleware.
+
+        :param max_concurrency: Максимальное количество апдейтов, обрабатываемых одновременно.
+        :param user_queue_limit: Сколько апдейтов одного пользователя может ждать или выполняться одновременно;
+            следующие апдейты отбрасываются.
+        """
+        super().__init__()
+        self.user_queue_limit = user_queue_limit
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[int, _UserQueue] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        chat = data.get("event_chat")
+        key = user.id if user is not None else chat.id if chat is not None else None
+        arrived_at = time.perf_counter()
+        if key is None:
+            return await self._execute(handler, event, data, arrived_at, arrived_at)
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = _UserQueue()
+            self._queues[key] = queue
+        if queue.pending >= self.user_queue_limit:
+            UPDATES_DROPPED.inc()
+            logger.warning("Очередь апдейтов пользователя %d переполнена, апдейт отброшен", key)
+            return None
+
+        queue.pending += 1
+        try:
+            async with queue.lock:
+                ready_at = time.perf_counter()
+                UPDATE_QUEUE_WAIT.labels("user").observe(ready_at - arrived_at)
+                return await self._execute(handler, event, data, arrived_at, ready_at)
+        finally:
+            queue.pending -= 1
+            if queue.pending == 0:
+                del self._queues[key]
+
+    async def _execute(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+        arrived_at: float,
+        ready_at: float,
+    ) -> Any:
+        """Дожидается общего слота и выполняет апдейт."""
+        slot = _UpdateSlot(self._semaphore)
+        await slot.acquire()
+
+        token = current_slot.set(slot)
+        try:
+            started_at = time.perf_counter()
+            UPDATE_QUEUE_WAIT.labels("global").observe(started_at - ready_at)
+            UPDATE_QUEUE_WAIT.labels("total").observe(started_at - arrived_at)
+            with UPDATES_IN_FLIGHT.track_inprogress():
+                return await handler(event, data)
+        finally:
+            current_slot.reset(token)
+            slot.release()
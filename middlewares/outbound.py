@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from middlewares.ordering import update_slot_released
+from utils.metrics import OUTBOUND_QUEUE_DEPTH, OUTBOUND_RETRIES, OUTBOUND_WAIT
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+outbound_lane: ContextVar[str] = ContextVar("outbound_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends() -> Iterator[None]:
+    """
+    Помечает отправки внутри блока как фоновые: они уступают очередь ответам пользователям.
+    """
+    token = outbound_lane.set(BULK)
+    try:
+        yield
+    finally:
+        outbound_lane.reset(token)
+
+
+class TokenBucket:
+    """
+    Ведро токенов с резервированием: каждый вызов reserve() занимает токен и возвращает,
+    сколько нужно подождать, прежде чем им воспользоваться.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate: Скорость пополнения, токенов в секунду.
+        :param capacity: Максимальное количество накопленных токенов.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Занимает один токен.
+
+        :return: Задержка в секундах до момента, когда токен станет доступен.
+        """
+        self._refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def delay(self, seconds: float) -> None:
+        """
+        Откладывает выдачу следующих токенов не меньше чем на seconds секунд.
+
+        :param seconds: Задержка в секундах.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 1) - seconds * self.rate
+
+    def _refill(self) -> None:
+        """Начисляет токены, накопившиеся с прошлого обращения."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+
+class OutboundScheduler:
+    """
+    Планировщик исходящих запросов к Bot API.
+
+    Сначала запрос ждет токен в ведре своего чата, затем — токен в общем ведре бота. Общие токены
+    выдаются одним циклом, который всегда сначала обслуживает очередь ответов пользователям,
+    а затем очередь фоновых отправок. После ответа 429 на отправку в чат на retry_after откладывается только
+    ведро этого чата; общая выдача токенов приостанавливается только после ответа 429 на запрос без чата.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: int,
+        group_rate: float,
+        max_chats: int = 10000,
+    ):
+        """
+        Инициализирует планировщик.
+
+        :param global_rate: Общий лимит запросов в секунду.
+        :param chat_rate: Лимит сообщений в секунду для личного чата.
+        :param chat_burst: Сколько сообщений в чат можно отправить подряд без ожидания.
+        :param group_rate: Лимит сообщений в секунду для группы.
+        :param max_chats: Сколько ведер чатов хранить (самые старые удаляются).
+        """
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: OrderedDict[int | str, TokenBucket] = OrderedDict()
+        self._waiters: dict[str, deque[asyncio.Future]] = {INTERACTIVE: deque(), BULK: deque()}
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        """Возвращает ведро токенов чата, создавая его при необходимости."""
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = TokenBucket(rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    def pause_chat(self, chat_id: int | str, seconds: float) -> None:
+        """
+        Откладывает отправку сообщений в чат, например после ответа 429 на отправку в этот чат.
+
+        :param chat_id: ID чата.
+        :param seconds: Длительность паузы.
+        """
+        self._chat_bucket(chat_id).delay(seconds)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Приостанавливает выдачу общих токенов, например после ответа 429 на запрос без чата.
+
+        :param seconds: Длительность паузы.
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, chat_id: int | str, lane: str) -> None:
+        """
+        Ждет разрешения на отправку сообщения в чат.
+
+        :param chat_id: ID чата.
+        :param lane: Очередь: INTERACTIVE или BULK.
+        """
+        started_at = time.monotonic()
+        delay = self._chat_bucket(chat_id).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        OUTBOUND_QUEUE_DEPTH.labels(lane).inc()
+        self._ensure_running()
+        self._wakeup.set()
+        try:
+            await future
+        finally:
+            OUTBOUND_QUEUE_DEPTH.labels(lane).dec()
+            OUTBOUND_WAIT.labels(lane).observe(time.monotonic() - started_at)
+
+    def _ensure_running(self) -> None:
+        """Запускает цикл выдачи общих токенов, если он еще не запущен."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _next_waiter(self) -> asyncio.Future | None:
+        """Возвращает следующего ожидающего с учетом приоритета очередей."""
+        for lane in (INTERACTIVE, BULK):
+            waiters = self._waiters[lane]
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    return future
+        return None
+
+    async def _run(self) -> None:
+        """Выдает общие токены ожидающим по одному."""
+        while True:
+            future = self._next_waiter()
+            if future is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            pause = self._paused_until - time.monotonic()
+            delay = max(self._global.reserve(), pause)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """Останавливает цикл выдачи токенов."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Middleware запросов к Bot API, которое пропускает отправку сообщений через OutboundScheduler
+    и повторяет запрос после ответа 429 с учетом retry_after.
+
+    На время ожидания апдейт возвращает общий слот OrderedExecutionMiddleware.
+
+    Запросы без chat_id (answerCallbackQuery, getUpdates и т.п.) не ограничиваются и не повторяются,
+    но ответ 429 на них приостанавливает все отправки.
+    """
+
+    def __init__(self, scheduler: OutboundScheduler, max_retries: int):
+        """
+        :param scheduler: Планировщик исходящих запросов.
+        :param max_retries: Сколько раз повторять запрос после ответа 429.
+        """
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                OUTBOUND_RETRIES.labels(type(method).__name__).inc()
+                self.scheduler.pause(e.retry_after)
+                raise
+
+        lane = outbound_lane.get()
+        attempt = 0
+        while True:
+            # Пока запрос ждет лимита, слот апдейта отдается другим пользователям.
+            async with update_slot_released():
+                await self.scheduler.acquire(chat_id, lane)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                OUTBOUND_RETRIES.labels(type(method).__name__).inc()
+                self.scheduler.pause_chat(chat_id, e.retry_after)
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    "Превышен лимит Bot API для %s, повтор через %d с", type(method).__name__, e.retry_after
+                )
@@ -0,0 +1,74 @@
+"""
+Архивация старых заказов: выгрузка месячных партиций в CSV, сжатый gzip, и отсоединение их от таблиц.
+
+Архивируются все месяцы старше заданного количества месяцев от текущего. Партиции заказов и позиций каждого
+месяца отсоединяются без блокировки таблиц для бота (DETACH PARTITION ... CONCURRENTLY), выгружаются в отдельный
+файл orders_ГГГГ_ММ.csv.gz (формат как у scripts.export_orders) и удаляются. С --keep отсоединенные таблицы
+остаются в базе.
+Выручка и продажи в статистике сохраняются: витрины продаж не пересчитываются.
+
+Запускать из корня проекта:
+    python -m scripts.archive_orders --older-than 12 --dir archive
+    python -m scripts.archive_orders --older-than 6 --dir archive --dry-run
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.database import engine as default_engine
+from database.partitions import add_months, archive_partition, get_partition_months, month_start
+
+logger = logging.getLogger(__name__)
+
+
+def positive_int(value: str) -> int:
+    """Разбирает положительное целое число для argparse."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("значение должно быть не меньше 1")
+    return number
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Архивация старых месячных партиций заказов")
+    parser.add_argument("--older-than", type=positive_int, required=True,
+                        help="Архивировать месяцы старше стольких месяцев от текущего")
+    parser.add_argument("--dir", default="archive", help="Каталог для файлов архива (по умолчанию archive)")
+    parser.add_argument("--keep", action="store_true", help="Не удалять отсоединенные таблицы")
+    parser.add_argument("--dry-run", action="store_true", help="Только показать месяцы, которые будут архивированы")
+    parser.add_argument("--dsn", default=None, help="URL базы данных (по умолчанию из настроек бота)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    engine = create_async_engine(args.dsn) if args.dsn else default_engine
+    cutoff = add_months(month_start(datetime.utcnow()), -args.older_than)
+
+    try:
+        async with engine.connect() as conn:
+            months = [month for month in await get_partition_months(conn) if month < cutoff]
+        if not months:
+            logger.info("Нет партиций старше %s", cutoff.isoformat())
+            return
+        if args.dry_run:
+            logger.info("Будут архивированы: %s", ", ".join(f"{month:%Y-%m}" for month in months))
+            return
+
+        os.makedirs(args.dir, exist_ok=True)
+        for month in months:
+            started_at = time.perf_counter()
+            path, written = await archive_partition(engine, month, args.dir, keep=args.keep)
+            logger.info(
+                "Месяц %s: %d строк выгружено в %s за %.1f с",
+                f"{month:%Y-%m}", written, path, time.perf_counter() - started_at,
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
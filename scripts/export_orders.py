@@ -0,0 +1,45 @@
+"""
+Выгрузка заказов с товарами в CSV, сжатый gzip.
+
+Заказы читаются через серверный курсор и записываются в файл по мере получения, поэтому расход памяти
+не зависит от выбранного периода.
+
+Запускать из корня проекта:
+    python -m scripts.export_orders orders.csv.gz
+    python -m scripts.export_orders orders_2026_09.csv.gz --from 2026-09-01 --to 2026-09-30
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import date
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.database import engine as default_engine
+from utils.export import export_orders
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Выгрузка заказов в CSV (gzip)")
+    parser.add_argument("path", help="Путь к создаваемому файлу .csv.gz")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None, help="ГГГГ-ММ-ДД")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None, help="ГГГГ-ММ-ДД")
+    parser.add_argument("--dsn", default=None, help="URL базы данных (по умолчанию из настроек бота)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    engine = create_async_engine(args.dsn) if args.dsn else default_engine
+
+    started_at = time.perf_counter()
+    try:
+        written = await export_orders(engine, args.path, args.date_from, args.date_to)
+    finally:
+        await engine.dispose()
+    logger.info("Выгружено %d строк в %s за %.1f с", written, args.path, time.perf_counter() - started_at)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,233 @@
+"""
+Массовая загрузка каталога товаров из CSV или JSONL.
+
+Файл читается потоково пакетами по --batch-size строк, каждый пакет загружается через COPY во временную
+таблицу, после чего все строки объединяются с каталогом несколькими запросами: недостающие категории
+создаются по названию, товары с уже существующим названием в той же категории обновляются (цена и описание),
+остальные добавляются. Если одна пара (категория, название) встречается в файле несколько раз, используется
+последняя строка. Вся загрузка выполняется в одной транзакции; в режиме --dry-run она откатывается.
+Объединение выполняется под advisory-блокировкой транзакции, поэтому одновременные загрузки не добавляют
+один и тот же товар дважды.
+
+Поля строки: name, description, price, category (название категории). В CSV нужна строка заголовка.
+
+Запускать из корня проекта:
+    python -m scripts.import_catalog products.csv
+    python -m scripts.import_catalog products.jsonl --dry-run
+
+После фиксации транзакции загрузка рассылает NOTIFY catalog_changed, и процессы работающего бота сбрасывают
+кэши каталога (см. database.catalog_sync).
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import math
+import time
+from typing import Any, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from database.catalog_sync import notify_catalog_changed
+from database.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "import_products"
+STAGING_COLUMNS = ["line", "name", "description", "price", "category"]
+# Ограничения длины совпадают с колонками products.name и categories.name.
+MAX_NAME_LENGTH = 100
+MAX_CATEGORY_LENGTH = 50
+# Ключ advisory-блокировки, под которой загрузки объединяют строки с каталогом.
+IMPORT_LOCK_ID = 7_305_202
+
+
+def read_rows(path: str, fmt: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    """
+    Потоково читает строки файла.
+
+    :param path: Путь к файлу.
+    :param fmt: 'csv' или 'jsonl'.
+    :return: Итератор пар (номер строки в файле, словарь полей или None, если строку не удалось разобрать).
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_num, json.loads(line)
+                except json.JSONDecodeError:
+                    yield line_num, None
+
+
+def parse_row(line: int, row: dict[str, Any] | None) -> tuple:
+    """
+    Проверяет строку и приводит ее к записи временной таблицы.
+
+    :param line: Номер строки в файле.
+    :param row: Поля строки.
+    :return: Запись (line, name, description, price, category).
+    :raises ValueError: Если строка некорректна.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("строка не является JSON-объектом")
+    name = str(row.get("name") or "").strip()
+    category = str(row.get("category") or "").strip()
+    description = str(row.get("description") or "").strip()
+    if not name or not category:
+        raise ValueError("не указано название товара или категория")
+    if len(name) > MAX_NAME_LENGTH or len(category) > MAX_CATEGORY_LENGTH:
+        raise ValueError("слишком длинное название товара или категории")
+
+    price = float(str(row.get("price", "")).replace(",", "."))
+    if not math.isfinite(price) or price <= 0:
+        raise ValueError("цена должна быть положительной")
+    return line, name, description, price, category
+
+
+async def _copy_batch(conn: AsyncConnection, batch: list[tuple]) -> None:
+    """Загружает пакет записей во временную таблицу через COPY."""
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(STAGING_TABLE, records=batch, columns=STAGING_COLUMNS)
+
+
+async def _merge(conn: AsyncConnection) -> dict[str, int]:
+    """
+    Объединяет загруженные строки с каталогом.
+
+    Товары сопоставляются по паре (категория, название), на которую нет уникального индекса, поэтому объединение
+    выполняется под advisory-блокировкой транзакции: следующая загрузка ждет фиксации предыдущей и видит
+    добавленные ею товары.
+
+    :return: Количество созданных категорий, обновленных и добавленных товаров.
+    """
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": IMPORT_LOCK_ID})
+    categories = await conn.execute(text(f"""
+        INSERT INTO categories (name)
+        SELECT DISTINCT category FROM {STAGING_TABLE}
+        ON CONFLICT (name) DO NOTHING
+    """))
+    await conn.execute(text(f"""
+        CREATE TEMP TABLE import_merge ON COMMIT DROP AS
+        SELECT DISTINCT ON (s.category, s.name) s.name, s.description, s.price, c.id AS category_id
+        FROM {STAGING_TABLE} s
+        JOIN categories c ON c.name = s.category
+        ORDER BY s.category, s.name, s.line DESC
+    """))
+    await conn.execute(text("ANALYZE import_merge"))
+    updated = await conn.execute(text("""
+        UPDATE products p
+        SET description = m.description, price = m.price
+        FROM import_merge m
+        WHERE p.category_id = m.category_id AND p.name = m.name
+    """))
+    inserted = await conn.execute(text("""
+        INSERT INTO products (name, description, price, category_id)
+        SELECT m.name, m.description, m.price, m.category_id
+        FROM import_merge m
+        WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.category_id = m.category_id AND p.name = m.name)
+    """))
+    return {
+        "categories_created": categories.rowcount,
+        "products_updated": updated.rowcount,
+        "products_inserted": inserted.rowcount,
+    }
+
+
+async def import_catalog(
+    engine: AsyncEngine,
+    path: str,
+    fmt: str,
+    batch_size: int,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """
+    Загружает каталог из файла.
+
+    :param engine: Асинхронный движок SQLAlchemy.
+    :param path: Путь к файлу.
+    :param fmt: 'csv' или 'jsonl'.
+    :param batch_size: Количество строк в одном пакете COPY.
+    :param dry_run: Если True, изменения откатываются.
+    :return: Количество прочитанных, пропущенных строк и результаты объединения.
+    """
+    read = skipped = 0
+    started_at = time.perf_counter()
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            await conn.execute(text(f"""
+                CREATE TEMP TABLE {STAGING_TABLE} (
+                    line bigint, name text, description text, price double precision, category text
+                ) ON COMMIT DROP
+            """))
+
+            batch = []
+            for line, row in read_rows(path, fmt):
+                read += 1
+                try:
+                    batch.append(parse_row(line, row))
+                except (ValueError, TypeError) as e:
+                    skipped += 1
+                    logger.warning("Строка %d пропущена: %s", line, e)
+                if len(batch) >= batch_size:
+                    await _copy_batch(conn, batch)
+                    batch.clear()
+                    elapsed = time.perf_counter() - started_at
+                    logger.info("Загружено %d строк (%.0f строк/с)", read, read / elapsed if elapsed else 0)
+            if batch:
+                await _copy_batch(conn, batch)
+
+            await conn.execute(text(f"ANALYZE {STAGING_TABLE}"))
+            result = await _merge(conn)
+        except BaseException:
+            await transaction.rollback()
+            raise
+
+        if dry_run:
+            await transaction.rollback()
+        else:
+            await notify_catalog_changed(conn)
+            await transaction.commit()
+
+    return {"rows_read": read, "rows_skipped": skipped, **result}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Массовая загрузка каталога из CSV или JSONL")
+    parser.add_argument("path", help="Путь к файлу с товарами")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="Проверить загрузку и откатить изменения")
+    parser.add_argument("--dsn", default=None, help="URL базы данных (по умолчанию из настроек бота)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    fmt = args.format or ("jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv")
+    engine = create_async_engine(args.dsn) if args.dsn else default_engine
+
+    started_at = time.perf_counter()
+    try:
+        result = await import_catalog(engine, args.path, fmt, args.batch_size, args.dry_run)
+    finally:
+        await engine.dispose()
+
+    logger.info(
+        "%s за %.1f с: прочитано %d, пропущено %d, новых категорий %d, обновлено товаров %d, добавлено %d",
+        "Проверка завершена (изменения откачены)" if args.dry_run else "Загрузка завершена",
+        time.perf_counter() - started_at,
+        result["rows_read"], result["rows_skipped"], result["categories_created"],
+        result["products_updated"], result["products_inserted"],
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
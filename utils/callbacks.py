@@ -0,0 +1,203 @@
+import logging
+from typing import Any, Callable, NamedTuple
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from middlewares.metrics import current_update_metrics
+
+logger = logging.getLogger(__name__)
+
+# Версия формата callback_data. Кнопки со старой версией считаются устаревшими.
+CALLBACK_VERSION = "1"
+SEPARATOR = ":"
+# Ограничение Telegram на длину callback_data в байтах.
+MAX_CALLBACK_DATA_LENGTH = 64
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _encode_int(value: int) -> str:
+    """Кодирует неотрицательное целое число в base36."""
+    if value < 0:
+        raise ValueError(f"Целое значение callback_data не может быть отрицательным: {value}")
+    digits = []
+    while True:
+        value, remainder = divmod(value, 36)
+        digits.append(_DIGITS[remainder])
+        if value == 0:
+            return "".join(reversed(digits))
+
+
+def _encode_value(field: type, value: Any) -> str:
+    """Кодирует одно значение callback_data в строку."""
+    if field is bool:
+        return "1" if value else "0"
+    if field is int:
+        return _encode_int(value)
+    value = str(value)
+    if SEPARATOR in value:
+        raise ValueError(f"Значение callback_data не может содержать '{SEPARATOR}': {value}")
+    return value
+
+
+def _decode_value(field: type, value: str) -> Any:
+    """Декодирует одно значение callback_data."""
+    if field is bool:
+        if value not in ("0", "1"):
+            raise ValueError(f"Неверное логическое значение: {value}")
+        return value == "1"
+    if field is int:
+        # int(value, 36) принимает знак, пробелы и '_', поэтому допустимые символы проверяются явно.
+        if not value or value.strip(_DIGITS):
+            raise ValueError(f"Неверное целое значение: {value}")
+        return int(value, 36)
+    return value
+
+
+class CallbackAction(NamedTuple):
+    """
+    Тип кнопки: короткий код и типы значений, которые передаются в хендлер позиционными аргументами.
+
+    Поддерживаются значения int (неотрицательные, кодируются в base36), bool и str.
+    """
+
+    code: str
+    fields: tuple[type, ...] = ()
+
+    def pack(self, *values: Any) -> str:
+        """
+        Кодирует callback_data вида '<версия><код>:<значение>:...'.
+
+        :param values: Значения в порядке fields.
+        :return: Строка callback_data.
+        :raises ValueError: Если количество значений не совпадает с fields или строка длиннее 64 байт.
+        """
+        if len(values) != len(self.fields):
+            raise ValueError(f"Действие '{self.code}' ожидает {len(self.fields)} значений, получено {len(values)}")
+        parts = [CALLBACK_VERSION + self.code, *(_encode_value(f, v) for f, v in zip(self.fields, values))]
+        data = SEPARATOR.join(parts)
+        if len(data.encode()) > MAX_CALLBACK_DATA_LENGTH:
+            raise ValueError(f"callback_data длиннее {MAX_CALLBACK_DATA_LENGTH} байт: {data}")
+        return data
+
+
+_ACTIONS: dict[str, CallbackAction] = {}
+
+
+def action(code: str, *fields: type) -> CallbackAction:
+    """
+    Объявляет тип кнопки.
+
+    :param code: Уникальный короткий код.
+    :param fields: Типы значений.
+    :return: Объявленный тип кнопки.
+    :raises ValueError: Если код уже занят.
+    """
+    if code in _ACTIONS or SEPARATOR in code:
+        raise ValueError(f"Недопустимый или повторяющийся код callback_data: {code}")
+    _ACTIONS[code] = CallbackAction(code, fields)
+    return _ACTIONS[code]
+
+
+def unpack(data: str) -> tuple[CallbackAction, tuple[Any, ...]]:
+    """
+    Декодирует callback_data, созданную CallbackAction.pack.
+
+    :param data: Строка callback_data.
+    :return: Пара (тип кнопки, значения).
+    :raises ValueError: Если версия, код или значения не подходят.
+    """
+    head, *parts = data.split(SEPARATOR)
+    if not head.startswith(CALLBACK_VERSION):
+        raise ValueError(f"Неподдерживаемая версия callback_data: {data}")
+    callback_action = _ACTIONS.get(head[len(CALLBACK_VERSION):])
+    if callback_action is None or len(parts) != len(callback_action.fields):
+        raise ValueError(f"Неизвестная callback_data: {data}")
+    return callback_action, tuple(_decode_value(f, v) for f, v in zip(callback_action.fields, parts))
+
+
+NOOP = action("n")
+TO_CATALOG = action("tc")
+CATEGORY = action("c", int)
+PRODUCTS_PAGE = action("pp", int, int, bool, int)  # ID категории, курсор, назад, номер страницы
+PRODUCT = action("p", int)
+CART_ADD = action("ca", int)
+CART_UPDATE = action("cu", str, int)  # действие (incr, decr, del), ID строки корзины
+ORDER_CREATE = action("oc")
+TO_ORDERS = action("to")
+ORDERS_PAGE = action("op", bool, str)  # назад, курсор заказа
+ADMIN_ORDER = action("ao", int)
+ORDER_STATUS = action("os", int, int)  # ID заказа, индекс статуса в ORDER_STATUSES
+MANAGE_CATEGORIES = action("mc")
+CATEGORY_ADD = action("ma")
+CATEGORY_DELETE_MENU = action("md")
+CATEGORY_DELETE = action("mx", int)
+PRODUCT_CATEGORY = action("ac", int)  # выбор категории при добавлении товара
+
+
+class _Route(NamedTuple):
+    handler: CallableObject
+    state: State | None
+
+
+class CallbackDispatcher:
+    """
+    Таблица хендлеров нажатий на инлайн-кнопки, индексированная кодом кнопки.
+
+    callback_data декодируется один раз, хендлер находится поиском в словаре, а значения кнопки передаются
+    в него позиционными аргументами после CallbackQuery. Остальные аргументы (session, state и т.п.)
+    передаются по имени, как в обычных хендлерах aiogram.
+    """
+
+    def __init__(self):
+        self._routes: dict[str, _Route] = {}
+        self.router = Router(name="callbacks")
+        self.router.callback_query.register(self._dispatch)
+
+    def handler(self, callback_action: CallbackAction, state: State | None = None) -> Callable:
+        """
+        Регистрирует хендлер для типа кнопки.
+
+        :param callback_action: Тип кнопки.
+        :param state: Состояние FSM, в котором должен находиться пользователь, или None.
+        :return: Декоратор.
+        :raises ValueError: Если для этого типа кнопки уже есть хендлер.
+        """
+
+        def decorator(callback: Callable) -> Callable:
+            if callback_action.code in self._routes:
+                raise ValueError(f"Для callback_data '{callback_action.code}' уже зарегистрирован хендлер")
+            self._routes[callback_action.code] = _Route(CallableObject(callback), state)
+            return callback
+
+        return decorator
+
+    async def _dispatch(self, callback: CallbackQuery, **data: Any) -> Any:
+        """Декодирует callback_data и вызывает хендлер из таблицы."""
+        try:
+            callback_action, values = unpack(callback.data or "")
+        except ValueError as e:
+            logger.warning("Неверные callback-данные от пользователя %d: %s", callback.from_user.id, e)
+            await callback.answer("Эта кнопка устарела. Откройте меню заново.", show_alert=True)
+            return None
+
+        route = self._routes.get(callback_action.code)
+        if route is None:
+            raise SkipHandler()
+        if route.state is not None and await data["state"].get_state() != route.state.state:
+            raise SkipHandler()
+
+        metrics = current_update_metrics.get()
+        if metrics is not None:
+            callback_function = route.handler.callback
+            metrics.router = callback_function.__module__.rsplit(".", 1)[-1]
+            metrics.handler = callback_function.__name__
+
+        return await route.handler.call(callback, *values, **data)
+
+
+callback_dispatcher = CallbackDispatcher()
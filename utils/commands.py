@@ -9,6 +9,7 @@ async def set_commands(bot: Bot):
 
     bot_commands = [
         BotCommand(command="start", description="🚀 Перезапустить бота"),
+        BotCommand(command="search", description="🔍 Поиск товаров"),
         BotCommand(command="admin", description="⚙️ Админ-панель"),
     ]
 
@@ -0,0 +1,104 @@
+import csv
+import gzip
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Table, and_, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.models import Order, OrderItem, Product
+
+# Сколько строк забирать с сервера за один раз через серверный курсор.
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "order_id",
+    "created_at",
+    "status",
+    "user_id",
+    "name",
+    "phone",
+    "address",
+    "total_cost",
+    "product_id",
+    "product_name",
+    "quantity",
+    "price",
+]
+
+
+async def export_orders(
+    engine: AsyncEngine,
+    path: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    orders: Table = Order.__table__,
+    order_items: Table = OrderItem.__table__,
+) -> int:
+    """
+    Выгружает заказы с товарами в CSV, сжатый gzip.
+
+    Одна строка файла соответствует одной позиции заказа (заказ без позиций — одна строка с пустыми полями товара).
+    Строки читаются через серверный курсор пакетами по EXPORT_BATCH_SIZE и сразу записываются в файл,
+    поэтому расход памяти не зависит от количества заказов.
+
+    :param engine: Асинхронный движок SQLAlchemy.
+    :param path: Путь к создаваемому файлу.
+    :param date_from: Первый день периода (включительно) или None.
+    :param date_to: Последний день периода (включительно) или None.
+    :param orders: Таблица заказов, например отсоединенная партиция при архивации.
+    :param order_items: Таблица позиций заказов.
+    :return: Количество записанных строк.
+    """
+    # Границы периода накладываются и на заказы, и на позиции, чтобы PostgreSQL читал только
+    # партиции нужных месяцев в обеих таблицах.
+    orders_period = []
+    items_period = []
+    if date_from is not None:
+        start = datetime.combine(date_from, time.min)
+        orders_period.append(orders.c.created_at >= start)
+        items_period.append(order_items.c.order_created_at >= start)
+    if date_to is not None:
+        end = datetime.combine(date_to + timedelta(days=1), time.min)
+        orders_period.append(orders.c.created_at < end)
+        items_period.append(order_items.c.order_created_at < end)
+
+    query = (
+        select(
+            orders.c.id,
+            orders.c.created_at,
+            orders.c.status,
+            orders.c.user_id,
+            orders.c.name,
+            orders.c.phone,
+            orders.c.address,
+            orders.c.total_cost,
+            order_items.c.product_id,
+            Product.name,
+            order_items.c.quantity,
+            order_items.c.price,
+        )
+        .select_from(orders)
+        .outerjoin(
+            order_items,
+            and_(
+                order_items.c.order_id == orders.c.id,
+                order_items.c.order_created_at == orders.c.created_at,
+                *items_period,
+            ),
+        )
+        .outerjoin(Product, Product.id == order_items.c.product_id)
+        .where(*orders_period)
+        .order_by(orders.c.created_at, orders.c.id, order_items.c.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    written = 0
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        async with engine.connect() as conn:
+            result = await conn.stream(query)
+            async for rows in result.partitions():
+                writer.writerows(rows)
+                written += len(rows)
+    return written
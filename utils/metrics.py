@@ -0,0 +1,191 @@
+import logging
+
+from aiohttp import web
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from database.cache import catalog_cache, search_cache, view_cache
+from database.cart_store import cart_store
+from database.database import get_pool_stats
+
+logger = logging.getLogger(__name__)
+
+HANDLER_LABELS = ["router", "handler"]
+
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds",
+    "Время обработки апдейта",
+    HANDLER_LABELS,
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors",
+    "Исключения, вышедшие из хендлера",
+    HANDLER_LABELS,
+)
+HANDLER_SQL_STATEMENTS = Histogram(
+    "bot_handler_sql_statements",
+    "Количество SQL-запросов за апдейт",
+    HANDLER_LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+HANDLER_DB_TIME = Histogram(
+    "bot_handler_db_duration_seconds",
+    "Суммарное время выполнения SQL-запросов за апдейт",
+    HANDLER_LABELS,
+)
+BOT_API_LATENCY = Histogram(
+    "bot_api_request_duration_seconds",
+    "Время выполнения запросов к Bot API",
+    ["method"],
+)
+BOT_API_ERRORS = Counter(
+    "bot_api_request_errors",
+    "Неудачные запросы к Bot API",
+    ["method"],
+)
+UPDATE_QUEUE_WAIT = Histogram(
+    "bot_update_queue_wait_seconds",
+    "Ожидание апдейта перед обработкой: за апдейтами того же пользователя (user), "
+    "свободного общего слота (global) и всего (total)",
+    ["stage"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPDATES_WAITING = Gauge(
+    "bot_updates_waiting",
+    "Апдейты, ожидающие свободного общего слота",
+)
+UPDATES_IN_FLIGHT = Gauge(
+    "bot_updates_in_flight",
+    "Апдейты, обрабатываемые в данный момент",
+)
+UPDATES_DROPPED = Counter(
+    "bot_updates_dropped",
+    "Апдейты, отброшенные из-за переполнения очереди пользователя",
+)
+OUTBOUND_QUEUE_DEPTH = Gauge(
+    "bot_outbound_queue_depth",
+    "Исходящие запросы к Bot API, ожидающие общего лимита",
+    ["lane"],
+)
+OUTBOUND_WAIT = Histogram(
+    "bot_outbound_wait_seconds",
+    "Время ожидания исходящего запроса в очереди ограничения частоты",
+    ["lane"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+OUTBOUND_RETRIES = Counter(
+    "bot_outbound_retries",
+    "Повторы запросов к Bot API после ответа 429",
+    ["method"],
+)
+OUTBOX_NOTIFICATIONS = Counter(
+    "bot_outbox_notifications",
+    "Обработанные уведомления из outbox по типу и результату (sent, retry, dropped)",
+    ["kind", "result"],
+)
+
+CART_SWEPT_ROWS = Counter(
+    "bot_cart_sweeper_purged_rows",
+    "Строки брошенных корзин, удаленные из базы",
+)
+CART_SWEEP_DURATION = Histogram(
+    "bot_cart_sweeper_duration_seconds",
+    "Длительность прохода удаления брошенных корзин",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+
+# Метрики супервизора в многопроцессном режиме. Они хранятся в отдельном реестре, потому что
+# супервизор отдает их вместе с метриками процессов-обработчиков.
+SUPERVISOR_REGISTRY = CollectorRegistry()
+WORKERS_ALIVE = Gauge(
+    "bot_supervisor_workers_alive",
+    "Работающие процессы-обработчики",
+    registry=SUPERVISOR_REGISTRY,
+)
+WORKER_RESTARTS = Counter(
+    "bot_supervisor_worker_restarts",
+    "Перезапуски упавших процессов-обработчиков",
+    ["worker"],
+    registry=SUPERVISOR_REGISTRY,
+)
+WORKER_UPDATES = Counter(
+    "bot_supervisor_routed_updates",
+    "Апдейты, переданные процессам-обработчикам",
+    ["worker"],
+    registry=SUPERVISOR_REGISTRY,
+)
+
+
+class RuntimeCollector(Collector):
+    """
+    Отдает текущее состояние пула соединений и кэша каталога в момент запроса метрик.
+    """
+
+    def collect(self):
+        pool = get_pool_stats()
+        for name in ("size", "checked_out", "checked_in", "overflow"):
+            yield GaugeMetricFamily(f"db_pool_{name}", f"Пул соединений: {name}", value=pool[name])
+        yield CounterMetricFamily("db_pool_checkouts", "Выдачи соединений из пула", value=pool["checkouts_total"])
+        yield CounterMetricFamily(
+            "db_pool_wait_seconds",
+            "Суммарное время ожидания свободного соединения в очереди пула",
+            value=pool["wait_seconds_total"],
+        )
+        yield GaugeMetricFamily(
+            "db_pool_wait_max_seconds",
+            "Максимальное время ожидания свободного соединения в очереди пула",
+            value=pool["wait_seconds_max"],
+        )
+
+        for prefix, title, cache in (
+            ("catalog", "каталога", catalog_cache),
+            ("search", "поиска", search_cache),
+            ("view", "представлений", view_cache),
+        ):
+            stats = cache.stats()
+            yield GaugeMetricFamily(f"{prefix}_cache_size", f"Записей в кэше {title}", value=stats["size"])
+            for name in ("hits", "misses", "evictions"):
+                yield CounterMetricFamily(f"{prefix}_cache_{name}", f"Кэш {title}: {name}", value=stats[name])
+
+        if cart_store is not None:
+            yield GaugeMetricFamily(
+                "cart_store_dirty_users", "Корзины с незаписанными изменениями", value=cart_store.dirty_users
+            )
+            yield CounterMetricFamily(
+                "cart_store_flushed_rows", "Строки корзин, записанные в базу", value=cart_store.flushed_rows
+            )
+
+
+REGISTRY.register(RuntimeCollector())
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Отдает метрики в текстовом формате Prometheus."""
+    return web.Response(body=generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """
+    Запускает HTTP-сервер с эндпоинтом /metrics.
+
+    :param host: Адрес для прослушивания.
+    :param port: Порт для прослушивания.
+    :return: Runner сервера, который нужно остановить через cleanup().
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logger.info("Метрики доступны на http://%s:%d/metrics", host, port)
+    return runner
@@ -0,0 +1,222 @@
+import asyncio
+import html
+import logging
+import time
+from datetime import timedelta
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from sqlalchemy import Row, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.models import OutboxMessage
+from middlewares.outbound import bulk_sends
+from utils.metrics import OUTBOX_NOTIFICATIONS
+
+logger = logging.getLogger(__name__)
+
+# Максимальная пауза между повторными попытками отправки уведомления, в секундах.
+MAX_RETRY_DELAY = 300
+# Сколько отправленных уведомлений удалять одним запросом.
+PRUNE_BATCH_SIZE = 1000
+
+
+def render_notification(kind: str, payload: dict[str, Any]) -> str:
+    """
+    Формирует текст уведомления.
+
+    :param kind: Тип уведомления ('order_created' или 'order_status').
+    :param payload: Данные уведомления из outbox.
+    :return: Текст сообщения.
+    :raises ValueError: Если тип уведомления неизвестен.
+    """
+    if kind == "order_created":
+        return (
+            f"🛒 <b>Новый заказ №{payload['order_id']}</b>\n\n"
+            f"<b>Имя:</b> {html.escape(payload['name'])}\n"
+            f"<b>Телефон:</b> {html.escape(payload['phone'])}\n"
+            f"<b>Адрес:</b> {html.escape(payload['address'])}\n"
+            f"<b>Сумма:</b> {payload['total_cost']} руб."
+        )
+    if kind == "order_status":
+        return f"Статус вашего заказа <b>№{payload['order_id']}</b> изменен на «{payload['status']}»."
+    raise ValueError(f"Неизвестный тип уведомления: {kind}")
+
+
+class OutboxDispatcher:
+    """
+    Фоновая отправка уведомлений из таблицы outbox.
+
+    Уведомления записываются в outbox в той же транзакции, что и изменение заказа, а диспетчер забирает их
+    пакетами: строки резервируются одним UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED), поэтому
+    несколько процессов не отправляют одно уведомление одновременно. Доставка — как минимум один раз:
+    уведомление помечается отправленным только после успешного ответа Bot API, а при сбое процесса
+    резерв истекает через lease секунд и уведомление отправляется снова.
+
+    Раз в prune_interval секунд диспетчер удаляет пакетами уведомления, отправленные больше retention секунд
+    назад.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        bot: Bot,
+        batch_size: int,
+        concurrency: int,
+        poll_interval: float,
+        lease: float,
+        max_attempts: int,
+        retention: float,
+        prune_interval: float,
+    ):
+        """
+        Инициализирует диспетчер.
+
+        :param engine: Асинхронный движок SQLAlchemy.
+        :param bot: Экземпляр бота для отправки сообщений.
+        :param batch_size: Сколько уведомлений забирать за один проход.
+        :param concurrency: Максимальное количество одновременных отправок.
+        :param poll_interval: Пауза между проверками outbox, если новых уведомлений нет, в секундах.
+        :param lease: На сколько секунд уведомление резервируется за диспетчером.
+        :param max_attempts: Сколько раз пытаться отправить уведомление.
+        :param retention: Через сколько секунд после отправки уведомление удаляется из outbox.
+        :param prune_interval: Интервал между удалениями отправленных уведомлений в секундах.
+        """
+        self.engine = engine
+        self.bot = bot
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: asyncio.Task | None = None
+
+    async def _claim(self) -> list[Row]:
+        """Резервирует пакет готовых к отправке уведомлений."""
+        pending = (
+            select(OutboxMessage.id)
+            .where(OutboxMessage.sent_at.is_(None), OutboxMessage.available_at <= func.now())
+            .order_by(OutboxMessage.available_at, OutboxMessage.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(pending.scalar_subquery()))
+            .values(
+                attempts=OutboxMessage.attempts + 1,
+                available_at=func.now() + timedelta(seconds=self.lease),
+            )
+            .returning(OutboxMessage.id, OutboxMessage.kind, OutboxMessage.chat_id, OutboxMessage.payload,
+                       OutboxMessage.attempts)
+        )
+        async with self.engine.begin() as conn:
+            return list((await conn.execute(query)).all())
+
+    async def _send(self, message: Row) -> str:
+        """
+        Отправляет одно уведомление.
+
+        :return: 'sent', 'retry' или 'dropped'.
+        """
+        async with self._semaphore:
+            try:
+                await self.bot.send_message(message.chat_id, render_notification(message.kind, message.payload))
+                return "sent"
+            except (TelegramForbiddenError, TelegramBadRequest, ValueError) as e:
+                logger.warning("Уведомление %d не может быть доставлено в чат %d: %s", message.id, message.chat_id, e)
+                return "dropped"
+            except Exception as e:
+                if message.attempts >= self.max_attempts:
+                    logger.error("Уведомление %d не отправлено после %d попыток: %s", message.id, message.attempts, e)
+                    return "dropped"
+                logger.warning("Ошибка при отправке уведомления %d, попытка %d: %s", message.id, message.attempts, e)
+                return "retry"
+
+    async def dispatch_batch(self) -> int:
+        """
+        Отправляет один пакет уведомлений и записывает результат.
+
+        :return: Количество обработанных уведомлений.
+        """
+        messages = await self._claim()
+        if not messages:
+            return 0
+
+        with bulk_sends():
+            results = await asyncio.gather(*(self._send(message) for message in messages))
+
+        done = [message.id for message, result in zip(messages, results) if result != "retry"]
+        retry = [message.id for message, result in zip(messages, results) if result == "retry"]
+        async with self.engine.begin() as conn:
+            if done:
+                await conn.execute(update(OutboxMessage).where(OutboxMessage.id.in_(done)).values(sent_at=func.now()))
+            if retry:
+                delay = func.least(func.power(2, OutboxMessage.attempts), MAX_RETRY_DELAY)
+                query = (
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(retry))
+                    .values(available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay))
+                )
+                await conn.execute(query)
+
+        for message, result in zip(messages, results):
+            OUTBOX_NOTIFICATIONS.labels(message.kind, result).inc()
+        return len(messages)
+
+    async def prune(self) -> int:
+        """
+        Удаляет пакетами по PRUNE_BATCH_SIZE уведомления, отправленные больше retention секунд назад.
+
+        :return: Количество удаленных уведомлений.
+        """
+        batch = (
+            select(OutboxMessage.id)
+            .where(OutboxMessage.sent_at < func.now() - timedelta(seconds=self.retention))
+            .limit(PRUNE_BATCH_SIZE)
+        )
+        deleted = 0
+        while True:
+            async with self.engine.begin() as conn:
+                result = await conn.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(batch.scalar_subquery())))
+            deleted += result.rowcount
+            if result.rowcount < PRUNE_BATCH_SIZE:
+                break
+        if deleted:
+            logger.info("Удалено %d отправленных уведомлений из outbox", deleted)
+        return deleted
+
+    async def _run(self) -> None:
+        """
+        Забирает уведомления, пока они есть, и ждет poll_interval, когда outbox пуст.
+        Раз в prune_interval секунд удаляет старые отправленные уведомления.
+        """
+        while True:
+            if time.monotonic() - self._pruned_at >= self.prune_interval:
+                self._pruned_at = time.monotonic()
+                try:
+                    await self.prune()
+                except Exception as e:
+                    logger.error("Ошибка при удалении отправленных уведомлений из outbox: %s", e)
+            try:
+                processed = await self.dispatch_batch()
+            except Exception as e:
+                logger.error("Ошибка при обработке outbox: %s", e)
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        """Запускает фоновую отправку уведомлений."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает фоновую отправку. Неотправленные уведомления остаются в outbox."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_order_cursor(created_at: datetime, order_id: int) -> str:
+    """
+    Кодирует курсор пагинации заказов в компактную строку для callback_data.
+
+    :param created_at: Дата создания граничного заказа.
+    :param order_id: ID граничного заказа.
+    :return: Строка вида '<микросекунды от эпохи>_<id>'.
+    """
+    return f"{(created_at - _EPOCH) // _MICROSECOND}_{order_id}"
+
+
+def decode_order_cursor(value: str) -> tuple[datetime, int]:
+    """
+    Декодирует курсор пагинации заказов, созданный encode_order_cursor.
+
+    :param value: Строка курсора.
+    :return: Пара (created_at, id).
+    :raises ValueError: Если строка имеет неверный формат.
+    """
+    micros, order_id = value.split("_")
+    return _EPOCH + timedelta(microseconds=int(micros)), int(order_id)
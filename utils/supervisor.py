@@ -0,0 +1,429 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from typing import Any, Callable, Dict
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.utils.backoff import Backoff, BackoffConfig
+from aiohttp import ClientSession, ClientTimeout, web
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.metrics_core import Metric
+from prometheus_client.parser import text_string_to_metric_families
+from prometheus_client.registry import Collector
+
+from config import settings
+from utils.metrics import SUPERVISOR_REGISTRY, WORKER_RESTARTS, WORKER_UPDATES, WORKERS_ALIVE
+
+logger = logging.getLogger(__name__)
+
+POLLING_TIMEOUT = 30
+POLLING_BACKOFF = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+# Как часто супервизор проверяет, что процессы-обработчики живы, в секундах.
+MONITOR_INTERVAL = 1.0
+# Если процесс упал быстрее, чем за STABLE_LIFETIME секунд после запуска, пауза перед следующим перезапуском
+# удваивается (но не больше MAX_RESTART_DELAY), чтобы не перезапускать его в цикле.
+STABLE_LIFETIME = 10.0
+MAX_RESTART_DELAY = 30.0
+# Сколько ждать ответа процесса-обработчика при сборе метрик, в секундах.
+SCRAPE_TIMEOUT = 2.0
+
+WorkerTarget = Callable[[int, Queue], None]
+
+
+def get_update_user_id(update: Dict[str, Any]) -> int | None:
+    """
+    Определяет, от какого пользователя пришел апдейт.
+
+    Для апдейтов без пользователя (например, постов в каналах) возвращается ID чата.
+
+    :param update: Апдейт в виде словаря Bot API.
+    :return: ID пользователя или чата, либо None, если апдейт не связан ни с тем, ни с другим.
+    """
+    for key, event in update.items():
+        if key == "update_id" or not isinstance(event, dict):
+            continue
+        user = event.get("from") or event.get("user")
+        if user is not None:
+            return user["id"]
+        chat = event.get("chat")
+        if chat is not None:
+            return chat["id"]
+    return None
+
+
+def get_worker_index(update: Dict[str, Any], workers: int) -> int:
+    """
+    Выбирает процесс-обработчик для апдейта.
+
+    Все апдейты одного пользователя попадают в один процесс: номер процесса — остаток от деления
+    ID пользователя на количество процессов. Апдейты без пользователя распределяются по update_id.
+
+    :param update: Апдейт в виде словаря Bot API.
+    :param workers: Количество процессов-обработчиков.
+    :return: Номер процесса.
+    """
+    user_id = get_update_user_id(update)
+    key = user_id if user_id is not None else update["update_id"]
+    return key % workers
+
+
+def get_worker_metrics_port(index: int) -> int:
+    """
+    Возвращает порт эндпоинта метрик процесса-обработчика.
+
+    :param index: Номер процесса.
+    :return: Порт: METRICS_PORT + 1 + номер процесса.
+    """
+    return settings.METRICS_PORT + 1 + index
+
+
+class WorkerPool:
+    """
+    Набор процессов-обработчиков апдейтов.
+
+    У каждого процесса своя очередь. При перезапуске упавшего процесса ему создается новая очередь:
+    процесс, убитый во время чтения из очереди, не освобождает ее внутреннюю блокировку, и новый процесс
+    не смог бы прочитать из старой очереди ни одного апдейта. Апдейты, оставшиеся в старой очереди, теряются.
+    """
+
+    def __init__(self, target: WorkerTarget, workers: int):
+        """
+        Инициализирует набор процессов.
+
+        :param target: Функция процесса-обработчика, принимает номер процесса и его очередь.
+        :param workers: Количество процессов.
+        """
+        self.target = target
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._queues: list[Queue] = [self._context.Queue() for _ in range(workers)]
+        self._processes: list[BaseProcess | None] = [None] * workers
+        self._started_at = [0.0] * workers
+        self._restart_delays = [0.0] * workers
+        self._restart_at: list[float | None] = [None] * workers
+        self._stopping = False
+        self._monitor_task: asyncio.Task | None = None
+
+    def _replace_queue(self, index: int) -> None:
+        """Заменяет очередь процесса с указанным номером новой, отбрасывая апдейты старой."""
+        queue = self._queues[index]
+        queue.cancel_join_thread()
+        queue.close()
+        self._queues[index] = self._context.Queue()
+
+    def _spawn(self, index: int) -> None:
+        """Запускает процесс-обработчик с указанным номером."""
+        if self._processes[index] is not None:
+            self._replace_queue(index)
+        process = self._context.Process(
+            target=self.target,
+            args=(index, self._queues[index]),
+            name=f"worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        self._restart_at[index] = None
+        logger.info("Запущен процесс-обработчик %d (pid %d)", index, process.pid)
+
+    def start(self) -> None:
+        """Запускает все процессы и наблюдение за ними."""
+        for index in range(self.workers):
+            self._spawn(index)
+        WORKERS_ALIVE.set(self.workers)
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    def route(self, update: Dict[str, Any]) -> None:
+        """
+        Передает апдейт процессу, который обслуживает его пользователя.
+
+        :param update: Апдейт в виде словаря Bot API.
+        """
+        index = get_worker_index(update, self.workers)
+        self._queues[index].put(update)
+        WORKER_UPDATES.labels(str(index)).inc()
+
+    async def _monitor(self) -> None:
+        """Перезапускает процессы, которые завершились не по команде супервизора."""
+        while not self._stopping:
+            await asyncio.sleep(MONITOR_INTERVAL)
+            now = time.monotonic()
+            alive = 0
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    alive += 1
+                    continue
+                if self._stopping:
+                    break
+
+                if self._restart_at[index] is None:
+                    if now - self._started_at[index] < STABLE_LIFETIME:
+                        delay = min(max(self._restart_delays[index] * 2, MONITOR_INTERVAL), MAX_RESTART_DELAY)
+                    else:
+                        delay = 0.0
+                    self._restart_delays[index] = delay
+                    self._restart_at[index] = now + delay
+                    logger.error(
+                        "Процесс-обработчик %d завершился с кодом %s, перезапуск через %.0f с",
+                        index,
+                        process.exitcode,
+                        delay,
+                    )
+                if now >= self._restart_at[index]:
+                    logger.warning("Апдейты из очереди процесса-обработчика %d будут потеряны", index)
+                    WORKER_RESTARTS.labels(str(index)).inc()
+                    self._spawn(index)
+            WORKERS_ALIVE.set(alive)
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Останавливает процессы: каждый дообрабатывает свою очередь и уже принятые апдейты.
+
+        :param timeout: Сколько ждать завершения процессов, прежде чем завершить их принудительно, в секундах.
+        """
+        self._stopping = True
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        for queue in self._queues:
+            queue.put(None)
+
+        loop = asyncio.get_running_loop()
+        for index, process in enumerate(self._processes):
+            await loop.run_in_executor(None, process.join, timeout)
+            if process.is_alive():
+                logger.warning("Процесс-обработчик %d не завершился вовремя и будет остановлен", index)
+                process.terminate()
+        WORKERS_ALIVE.set(0)
+
+
+async def consume_updates(
+    dp: Dispatcher,
+    bot: Bot,
+    queue: Queue,
+    max_pending: int,
+    shutdown_timeout: float,
+) -> None:
+    """
+    Обрабатывает апдейты из очереди процесса-обработчика, пока супервизор не пришлет None.
+
+    Из очереди забирается не больше max_pending апдейтов, которые еще не обработаны. Это ограничивает память,
+    а не параллельность: ее ограничивает OrderedExecutionMiddleware, и апдейты, ждущие за предыдущими
+    апдейтами своего пользователя, тоже занимают места. Поэтому max_pending должен быть намного больше
+    UPDATE_CONCURRENCY.
+
+    :param dp: Диспетчер aiogram.
+    :param bot: Экземпляр бота.
+    :param queue: Очередь процесса.
+    :param max_pending: Максимальное количество принятых, но еще не обработанных апдейтов.
+    :param shutdown_timeout: Сколько ждать завершения уже принятых апдейтов при остановке, в секундах.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_pending)
+    tasks: set[asyncio.Task] = set()
+
+    async def process(update: Dict[str, Any]) -> None:
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception as e:
+            logger.error("Ошибка при обработке апдейта %s: %s", update.get("update_id"), e)
+        finally:
+            semaphore.release()
+
+    while True:
+        update = await loop.run_in_executor(None, queue.get)
+        if update is None:
+            break
+        await semaphore.acquire()
+        task = asyncio.create_task(process(update))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        logger.info("Ожидание завершения %d апдейтов...", len(tasks))
+        _, pending = await asyncio.wait(tasks, timeout=shutdown_timeout)
+        for task in pending:
+            task.cancel()
+
+
+async def poll_updates(bot: Bot, pool: WorkerPool, allowed_updates: list[str]) -> None:
+    """
+    Получает апдейты через long polling и распределяет их по процессам-обработчикам.
+
+    :param bot: Экземпляр бота.
+    :param pool: Процессы-обработчики.
+    :param allowed_updates: Типы апдейтов, которые нужно получать.
+    """
+    backoff = Backoff(config=POLLING_BACKOFF)
+    offset = None
+    while True:
+        method = GetUpdates(offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates)
+        try:
+            updates = await bot(method, request_timeout=int(bot.session.timeout + POLLING_TIMEOUT))
+        except Exception as e:
+            logger.error("Не удалось получить апдейты: %s", e)
+            await backoff.asleep()
+            continue
+        backoff.reset()
+
+        for update in updates:
+            pool.route(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+            offset = update.update_id + 1
+
+
+def create_webhook_app(pool: WorkerPool) -> web.Application:
+    """
+    Создает aiohttp-приложение, которое принимает апдейты вебхука и распределяет их по процессам-обработчикам.
+
+    :param pool: Процессы-обработчики.
+    :return: Приложение.
+    """
+
+    async def webhook_handler(request: web.Request) -> web.Response:
+        secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
+        if settings.WEBHOOK_SECRET and secret != settings.WEBHOOK_SECRET:
+            return web.Response(status=401)
+        pool.route(await request.json())
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post(settings.WEBHOOK_PATH, webhook_handler)
+    return app
+
+
+class _ScrapedCollector(Collector):
+    """Отдает заранее собранные семейства метрик."""
+
+    def __init__(self, families: list[Metric]):
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+
+async def combined_metrics_handler(request: web.Request) -> web.Response:
+    """
+    Собирает метрики всех процессов-обработчиков и отдает их одним ответом.
+
+    К каждой метрике процесса добавляется метка worker. Процессы, которые не ответили (например, перезапускаются),
+    пропускаются.
+    """
+    pool: WorkerPool = request.app["pool"]
+    session: ClientSession = request.app["session"]
+
+    async def scrape(index: int) -> str | None:
+        url = f"http://{settings.METRICS_HOST}:{get_worker_metrics_port(index)}/metrics"
+        try:
+            async with session.get(url) as response:
+                return await response.text()
+        except Exception as e:
+            logger.warning("Не удалось получить метрики процесса-обработчика %d: %s", index, e)
+            return None
+
+    texts = await asyncio.gather(*(scrape(index) for index in range(pool.workers)))
+    families: dict[str, Metric] = {}
+    for index, text in enumerate(texts):
+        if text is None:
+            continue
+        for family in text_string_to_metric_families(text):
+            merged = families.get(family.name)
+            if merged is None:
+                merged = Metric(family.name, family.documentation, family.type, family.unit)
+                families[family.name] = merged
+            merged.samples.extend(
+                sample._replace(labels={**sample.labels, "worker": str(index)}) for sample in family.samples
+            )
+
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(_ScrapedCollector(list(families.values())))
+    body = generate_latest(SUPERVISOR_REGISTRY) + generate_latest(registry)
+    return web.Response(body=body, headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+async def start_combined_metrics_server(pool: WorkerPool, host: str, port: int) -> web.AppRunner:
+    """
+    Запускает HTTP-сервер с эндпоинтом /metrics, который объединяет метрики процессов-обработчиков.
+
+    :param pool: Процессы-обработчики.
+    :param host: Адрес для прослушивания.
+    :param port: Порт для прослушивания.
+    :return: Runner сервера, который нужно остановить через cleanup().
+    """
+    app = web.Application()
+    app["pool"] = pool
+    app["session"] = ClientSession(timeout=ClientTimeout(total=SCRAPE_TIMEOUT))
+    app.router.add_get("/metrics", combined_metrics_handler)
+
+    async def close_session(app: web.Application) -> None:
+        await app["session"].close()
+
+    app.on_cleanup.append(close_session)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logger.info("Объединенные метрики доступны на http://%s:%d/metrics", host, port)
+    return runner
+
+
+async def run_supervisor(bot: Bot, allowed_updates: list[str], target: WorkerTarget, workers: int) -> None:
+    """
+    Запускает процессы-обработчики и распределяет между ними апдейты из long polling или вебхука.
+
+    Работает до получения SIGINT или SIGTERM. Упавшие процессы перезапускаются.
+
+    :param bot: Экземпляр бота для получения апдейтов.
+    :param allowed_updates: Типы апдейтов, которые нужно получать.
+    :param target: Функция процесса-обработчика, принимает номер процесса и его очередь.
+    :param workers: Количество процессов.
+    :raises RuntimeError: Если включен режим вебхука, но не задан WEBHOOK_URL.
+    """
+    if settings.USE_WEBHOOK and not settings.WEBHOOK_URL:
+        raise RuntimeError("Для режима вебхука необходимо задать WEBHOOK_URL")
+
+    pool = WorkerPool(target, workers)
+    pool.start()
+
+    metrics_runner = None
+    if settings.METRICS_ENABLED:
+        metrics_runner = await start_combined_metrics_server(pool, settings.METRICS_HOST, settings.METRICS_PORT)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    webhook_runner = None
+    polling_task = None
+    try:
+        if settings.USE_WEBHOOK:
+            webhook_runner = web.AppRunner(create_webhook_app(pool))
+            await webhook_runner.setup()
+            await web.TCPSite(webhook_runner, host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT).start()
+            await bot.set_webhook(
+                url=f"{settings.WEBHOOK_URL.rstrip('/')}{settings.WEBHOOK_PATH}",
+                secret_token=settings.WEBHOOK_SECRET,
+                allowed_updates=allowed_updates,
+            )
+            logger.info("Вебхук-сервер запущен на %s:%d", settings.WEBAPP_HOST, settings.WEBAPP_PORT)
+        else:
+            await bot.delete_webhook()
+            polling_task = asyncio.create_task(poll_updates(bot, pool, allowed_updates))
+        logger.info("Супервизор запущен, процессов-обработчиков: %d", workers)
+
+        await stop_event.wait()
+    finally:
+        logger.info("Остановка супервизора...")
+        if polling_task is not None:
+            polling_task.cancel()
+        if webhook_runner is not None:
+            await webhook_runner.cleanup()
+        await pool.stop(settings.WORKER_SHUTDOWN_TIMEOUT + 5)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
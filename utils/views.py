@@ -0,0 +1,128 @@
+import math
+from typing import Awaitable, Callable, Hashable, NamedTuple
+
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.cache import MISSING, catalog_version, view_cache
+from database.models import Product
+from database.requests import (
+    PRODUCTS_PAGE_SIZE,
+    count_products_in_category,
+    get_categories,
+    get_product,
+    get_products_page,
+)
+from keyboards.inline import get_category_keyboard, get_product_card_keyboard, get_products_keyboard
+
+
+class View(NamedTuple):
+    """Готовое к отправке представление: текст сообщения и клавиатура."""
+
+    text: str
+    reply_markup: InlineKeyboardMarkup
+
+
+def format_product_card(product: Product) -> str:
+    """
+    Формирует текст карточки товара.
+
+    :param product: Объект товара.
+    :return: Текст карточки.
+    """
+    return (
+        f"<b>{product.name}</b>\n\n"
+        f"{product.description}\n\n"
+        f"<b>Цена:</b> {product.price} руб."
+    )
+
+
+async def _cached_view(key: tuple[Hashable, ...], render: Callable[[], Awaitable[View | None]]) -> View | None:
+    """
+    Возвращает представление из кэша или отрисовывает и сохраняет его.
+
+    К ключу добавляется текущая версия каталога, поэтому после изменения каталога представление
+    отрисовывается заново.
+
+    :param key: Ключ представления (тип и ID сущности).
+    :param render: Функция отрисовки.
+    :return: Представление или None, если отображать нечего.
+    """
+    key = (*key, catalog_version.value)
+    view = view_cache.get(key)
+    if view is MISSING:
+        view = await render()
+        view_cache.set(key, view)
+    return view
+
+
+async def get_categories_view(session: AsyncSession) -> View | None:
+    """
+    Получает представление списка категорий.
+
+    :param session: Асинхронная сессия базы данных.
+    :return: Представление или None, если категорий нет.
+    """
+
+    async def render() -> View | None:
+        categories = await get_categories(session)
+        if not categories:
+            return None
+        return View("Выберите категорию:", get_category_keyboard(categories))
+
+    return await _cached_view(("categories",), render)
+
+
+async def get_products_page_view(
+    session: AsyncSession,
+    category_id: int,
+    cursor: int | None = None,
+    backward: bool = False,
+    page: int = 1,
+) -> View | None:
+    """
+    Получает представление страницы товаров категории.
+
+    :param session: Асинхронная сессия базы данных.
+    :param category_id: ID категории.
+    :param cursor: ID граничного товара или None для первой страницы.
+    :param backward: Если True, отображается страница перед курсором.
+    :param page: Номер отображаемой страницы.
+    :return: Представление или None, если в категории нет товаров.
+    """
+
+    async def render() -> View | None:
+        products, has_prev, has_next = await get_products_page(session, category_id, cursor, backward=backward)
+        current = page
+        if not products and cursor is not None:
+            products, has_prev, has_next = await get_products_page(session, category_id)
+        if not products:
+            return None
+        if not has_prev:
+            current = 1
+
+        count = await count_products_in_category(session, category_id)
+        pages = max(math.ceil(count / PRODUCTS_PAGE_SIZE), current)
+        keyboard = get_products_keyboard(products, category_id, current, pages, has_prev, has_next)
+        return View("Выберите товар:", keyboard)
+
+    return await _cached_view(("products_page", category_id, cursor, backward, page), render)
+
+
+async def get_product_card_view(session: AsyncSession, product_id: int) -> View | None:
+    """
+    Получает представление карточки товара.
+
+    :param session: Асинхронная сессия базы данных.
+    :param product_id: ID товара.
+    :return: Представление или None, если товар не найден.
+    """
+
+    async def render() -> View | None:
+        product = await get_product(session, product_id)
+        if product is None:
+            return None
+        keyboard = get_product_card_keyboard(product_id=product.id, category_id=product.category_id)
+        return View(format_product_card(product), keyboard)
+
+    return await _cached_view(("product_card", product_id), render)
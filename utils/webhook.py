@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import signal
+from typing import Any, Dict
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука, который отвечает Telegram 200 OK и обрабатывает апдейты в фоне
+    с ограничением на количество принятых, но еще не обработанных апдейтов.
+
+    Место для апдейта занимается до создания фоновой задачи: если все места заняты, ответ Telegram
+    задерживается до освобождения места, и новые апдейты не принимаются.
+
+    Ограничение защищает память процесса от накопления апдейтов. Параллельность хендлеров ограничивает
+    OrderedExecutionMiddleware, поэтому max_pending должен быть намного больше UPDATE_CONCURRENCY: апдейты,
+    ждущие своей очереди за предыдущими апдейтами пользователя, тоже занимают места.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_pending: int, **kwargs: Any):
+        """
+        Инициализирует обработчик.
+
+        :param dispatcher: Диспетчер aiogram.
+        :param bot: Экземпляр бота.
+        :param max_pending: Максимальное количество принятых, но еще не обработанных апдейтов.
+        """
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_pending)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        """Дожидается свободного места, принимает апдейт и запускает его обработку в фоне."""
+        update = await request.json(loads=bot.session.json_loads)
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        """Обрабатывает апдейт и освобождает занятое им место."""
+        try:
+            await super()._background_feed_update(bot=bot, update=update)
+        except Exception as e:
+            logger.error("Ошибка при обработке апдейта из вебхука: %s", e)
+        finally:
+            self._semaphore.release()
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Дожидается завершения уже принятых апдейтов.
+
+        :param timeout: Максимальное время ожидания в секундах.
+        """
+        if not self._tasks:
+            return
+
+        logger.info("Ожидание завершения %d апдейтов...", len(self._tasks))
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Прервано %d незавершенных апдейтов", len(pending))
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """
+    Запускает встроенный aiohttp-сервер для приема апдейтов через вебхук.
+
+    Работает до получения SIGINT или SIGTERM, после чего корректно останавливает сервер.
+
+    :param dp: Диспетчер aiogram.
+    :param bot: Экземпляр бота.
+    :raises RuntimeError: Если не задан WEBHOOK_URL.
+    """
+    if not settings.WEBHOOK_URL:
+        raise RuntimeError("Для режима вебхука необходимо задать WEBHOOK_URL")
+
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        max_pending=settings.WEBHOOK_MAX_PENDING,
+        secret_token=settings.WEBHOOK_SECRET,
+    )
+
+    async def on_shutdown(_: web.Application) -> None:
+        await handler.drain(settings.WEBHOOK_SHUTDOWN_TIMEOUT)
+
+    # Ожидание апдейтов регистрируется до закрытия сессии бота, которое добавляет handler.register.
+    app.on_shutdown.append(on_shutdown)
+    handler.register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        url=f"{settings.WEBHOOK_URL.rstrip('/')}{settings.WEBHOOK_PATH}",
+        secret_token=settings.WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.WEBAPP_HOST, port=settings.WEBAPP_PORT)
+    await site.start()
+    logger.info("Вебхук-сервер запущен на %s:%d", settings.WEBAPP_HOST, settings.WEBAPP_PORT)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Остановка вебхук-сервера...")
+        await runner.cleanup()